@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import computed_field
@@ -9,11 +10,102 @@ BASE_DIR = Path(__file__).parent.parent.parent
 class AuthJWT(BaseSettings):
     private_key: Path = BASE_DIR / "certs" / "jwt-private.pem"
     public_key: Path = BASE_DIR / "certs" / "jwt-public.pem"
-    algorithm: str = "RS256"
+    # публичные ключи предыдущих пар, токены которых еще принимаются (ротация)
+    extra_public_keys: list[Path] = []
+    # как часто (в секундах) проверять, изменились ли файлы ключей
+    keys_check_interval: int = 5
+    # RS256, ES256 или EdDSA (Ed25519); ключи можно создать через app.services.keygen
+    algorithm: Literal["RS256", "ES256", "EdDSA"] = "RS256"
     access_token_expire_minutes: int = 15
     refresh_token_expire_minutes: int = 10080
     max_sessions: int = 3
     secure_cookie: bool = False
+    # сколько проверенных access токенов держать в LRU-кэше (0 - отключить)
+    verified_token_cache_size: int = 10000
+    # добавлять в access токен id и код роли пользователя
+    embed_role_claims: bool = False
+
+
+class PasswordHashingConfig(BaseSettings):
+    # пул для bcrypt: потоки (bcrypt отпускает GIL) или процессы
+    hash_executor: Literal["thread", "process"] = "thread"
+    hash_workers: int = 4
+    # сколько операций может ждать в пуле, сверх этого запросы отклоняются
+    hash_max_pending: int = 64
+    # стоимость bcrypt подбирается при старте так, чтобы хеш занимал ~hash_target_ms.
+    # При нескольких воркерах/инстансах лучше зафиксировать hash_rounds значением
+    # из лога калибровки. Подобранная стоимость только повышает старые хеши,
+    # а явно заданная применяется в обе стороны (понижение ускоряет вход)
+    hash_rounds: int | None = None
+    hash_target_ms: float = 250
+    hash_min_rounds: int = 10
+    hash_max_rounds: int = 16
+
+
+class UserCacheConfig(BaseSettings):
+    # сколько секунд снимок пользователя живет в кэше воркера
+    user_cache_ttl: int = 60
+    user_cache_max_size: int = 10000
+
+
+class SessionSweeperConfig(BaseSettings):
+    # фоновая чистка просроченных refresh-сессий
+    sweeper_enabled: bool = True
+    sweeper_interval_seconds: int = 3600
+    sweeper_batch_size: int = 1000
+
+
+class LoginThrottleConfig(BaseSettings):
+    login_throttle_enabled: bool = True
+    # попыток в минуту и емкость корзины для каждого email / IP / fingerprint
+    login_email_per_minute: float = 5
+    login_email_burst: int = 10
+    login_ip_per_minute: float = 30
+    login_ip_burst: int = 60
+    login_fingerprint_per_minute: float = 10
+    login_fingerprint_burst: int = 20
+    # сколько ключей хранить в памяти воркера
+    login_throttle_max_keys: int = 100_000
+    # общее для воркеров хранилище (требует пакет redis)
+    login_throttle_redis_url: str | None = None
+
+
+class CountConfig(BaseSettings):
+    # до какого оценочного числа строк режим auto считает точно
+    count_exact_threshold: int = 10_000
+    # кэш точных подсчетов по фильтру
+    count_cache_ttl: int = 30
+    count_cache_max_size: int = 1000
+
+
+class TaskListConfig(BaseSettings):
+    # если пользователю видно не больше N проектов, страница GET /api/tasks
+    # собирается из keyset-выборок по каждому его проекту, а не фильтром видимости
+    # по всей таблице: при редких видимых задачах фильтр читал бы почти все строки
+    task_list_branch_projects: int = 50
+
+
+class InstrumentationConfig(BaseSettings):
+    # учет SQL по запросам: заголовок Server-Timing и /api/metrics
+    sql_instrumentation_enabled: bool = True
+    # предупреждать, если один запрос выполнен больше N раз за HTTP-запрос (0 - нет)
+    n_plus_one_threshold: int = 0
+    # коды ролей, которым доступен /api/metrics; по умолчанию - никому.
+    # Статистика раскрывает нагрузку по эндпоинтам, открывайте ее для dev или админов
+    metrics_role_codes: list[str] = []
+
+
+class DatabaseEngineConfig(BaseSettings):
+    # direct - прямое подключение к Postgres: пул SQLAlchemy и кэш подготовленных
+    # запросов asyncpg; pooler - за PgBouncer в режиме transaction: без своего пула
+    # (NullPool) и без кэша, подготовленные запросы получают уникальные имена
+    db_pool_mode: Literal["direct", "pooler"] = "direct"
+    # сколько подготовленных запросов держать на соединение в режиме direct
+    db_statement_cache_size: int = 1000
+    # проверять соединение перед выдачей из пула (лишний round trip на checkout)
+    db_pool_pre_ping: bool = False
+    # пересоздавать соединения старше N секунд (-1 - не пересоздавать)
+    db_pool_recycle: int = -1
 
 
 class ApiConfig(BaseSettings):
@@ -31,6 +123,8 @@ class Settings(BaseSettings):
     POOL_SIZE: int
     POOL_OVERFLOW: int
     POOL_TIMEOUT: int
+    # реплики только для чтения, JSON-список URL (postgresql+asyncpg://...)
+    REPLICA_DATABASE_URLS: list[str] = []
     LOGS_DIR: Path = BASE_DIR / "logs"
     LOG_INFO_ENABLED: bool
     LOG_ERROR_ENABLED: bool
@@ -38,6 +132,14 @@ class Settings(BaseSettings):
     DOMAIN: str
     api_config: ApiConfig = ApiConfig()
     auth_jwt: AuthJWT = AuthJWT()
+    password_hashing: PasswordHashingConfig = PasswordHashingConfig()
+    user_cache: UserCacheConfig = UserCacheConfig()
+    session_sweeper: SessionSweeperConfig = SessionSweeperConfig()
+    login_throttle: LoginThrottleConfig = LoginThrottleConfig()
+    count: CountConfig = CountConfig()
+    task_list: TaskListConfig = TaskListConfig()
+    instrumentation: InstrumentationConfig = InstrumentationConfig()
+    db_engine: DatabaseEngineConfig = DatabaseEngineConfig()
     model_config = SettingsConfigDict(env_file=BASE_DIR / ".env", extra="ignore")
 
     @computed_field
@@ -47,3 +47,25 @@ UserNotFoundException = HTTPException(
     status_code=status.HTTP_404_NOT_FOUND,
     detail="Пользователь не найден",
 )
+
+PasswordHasherBusyException = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Сервис перегружен, повторите попытку позже",
+    headers={"Retry-After": "1"},
+)
+
+TooManyLoginAttemptsException = HTTPException(
+    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+    detail="Слишком много попыток входа, повторите позже",
+    headers={"Retry-After": "60"},
+)
+
+InvalidCursorException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Некорректный курсор пагинации",
+)
+
+ForbiddenException = HTTPException(
+    status_code=status.HTTP_403_FORBIDDEN,
+    detail="Недостаточно прав",
+)
@@ -0,0 +1,163 @@
+"""
+Учет SQL-запросов в рамках HTTP-запроса.
+
+Статистика текущего запроса хранится в ContextVar. Контекст asyncio-задачи
+виден и внутри greenlet, в котором SQLAlchemy выполняет синхронную часть
+драйвера, поэтому события движка и пула пишут в статистику своего запроса.
+"""
+
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_time: float = 0.0
+    pool_wait: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} queries", '
+            f"db-pool;dur={self.pool_wait * 1000:.2f}"
+        )
+
+
+@dataclass
+class RouteMetrics:
+    requests: int = 0
+    statements: int = 0
+    max_statements: int = 0
+    db_time: float = 0.0
+    pool_wait: float = 0.0
+
+    def add(self, stats: RequestStats) -> None:
+        self.requests += 1
+        self.statements += stats.statements
+        self.max_statements = max(self.max_statements, stats.statements)
+        self.db_time += stats.db_time
+        self.pool_wait += stats.pool_wait
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "avg_statements": round(self.statements / self.requests, 2),
+            "max_statements": self.max_statements,
+            "avg_db_ms": round(self.db_time * 1000 / self.requests, 3),
+            "avg_pool_wait_ms": round(self.pool_wait * 1000 / self.requests, 3),
+        }
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+# накопленные метрики по шаблону пути эндпоинта
+route_metrics: dict[str, RouteMetrics] = {}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_stats.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.db_time += time.perf_counter() - context._instrumentation_started
+    stats.shapes[statement] += 1
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Подключает учет запросов к движку
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class TimedPoolMixin:
+    """
+    Учитывает время получения соединения из пула: ожидание свободного
+    соединения, а для NullPool - установку нового
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            stats = request_stats.get()
+            if stats is not None:
+                stats.pool_wait += time.perf_counter() - started
+
+
+class TimedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(TimedPoolMixin, NullPool):
+    pass
+
+
+class SQLInstrumentationMiddleware:
+    """
+    ASGI middleware: собирает статистику SQL для каждого HTTP-запроса,
+    отдает ее в заголовке Server-Timing и копит метрики по эндпоинтам.
+    Если один и тот же запрос выполнен больше n_plus_one_threshold раз,
+    пишет предупреждение о вероятной проблеме N+1 (0 - не проверять).
+    """
+
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = 0):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            self._collect(scope, stats)
+
+    def _collect(self, scope: Scope, stats: RequestStats) -> None:
+        route = scope.get("route")
+        path = getattr(route, "path", None) or "<unmatched>"
+        route_metrics.setdefault(f"{scope['method']} {path}", RouteMetrics()).add(stats)
+
+        if not self.n_plus_one_threshold:
+            return
+        for statement, count in stats.shapes.items():
+            if count > self.n_plus_one_threshold:
+                logger.warning(
+                    f"Возможный N+1: запрос выполнен {count} раз за "
+                    f"{scope['method']} {path}: {statement[:300]}"
+                )
+
+
+def metrics_snapshot() -> dict:
+    return {route: metrics.as_dict() for route, metrics in route_metrics.items()}
@@ -1,17 +1,139 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import random
+import uuid
+from typing import Optional, Sequence
 
-from app.core.config import settings
-
-engine = create_async_engine(
-    url=settings.DATABASE_URL,
-    pool_size=settings.POOL_SIZE,
-    max_overflow=settings.POOL_OVERFLOW,
-    pool_timeout=settings.POOL_TIMEOUT,
-)
-async_session_maker = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
+from sqlalchemy import event, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
 )
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.pool import NullPool
+
+from app.core.config import DatabaseEngineConfig, settings
+from app.core.instrumentation import TimedNullPool, TimedQueuePool, instrument_engine
+
+# execution option, которым DAO помечает запросы, допускающие чтение с реплики
+USE_REPLICA = "use_replica"
+
+
+class RoutingSession(Session):
+    """
+    Сессия, отправляющая помеченные use_replica запросы на случайную реплику.
+    После первой записи (flush или DML) сессия до конца своей жизни читает
+    только с основной БД, чтобы видеть свои изменения несмотря на отставание реплик.
+    """
+
+    def __init__(self, *args, replicas: Sequence = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+        self.use_primary = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.replicas
+            and not self.use_primary
+            and clause is not None
+            and clause.get_execution_options().get(USE_REPLICA)
+        ):
+            return random.choice(self.replicas)
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _stick_to_primary_on_write(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.use_primary = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_to_primary_after_flush(session: RoutingSession, flush_context) -> None:
+    session.use_primary = True
+
+
+def make_session_maker(
+    primary: AsyncEngine, replicas: Sequence[AsyncEngine] = ()
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Фабрика сессий с основной БД и необязательными репликами для чтения
+    :param primary:
+    :param replicas:
+    :return:
+    """
+    return async_sessionmaker(
+        primary,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        replicas=[replica.sync_engine for replica in replicas],
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def engine_options(url: str, config: DatabaseEngineConfig) -> dict:
+    """
+    Параметры create_async_engine для режима подключения из config
+    :param url:
+    :param config:
+    :return:
+    """
+    instrumented = settings.instrumentation.sql_instrumentation_enabled
+    options = {
+        "pool_pre_ping": config.db_pool_pre_ping,
+        "pool_recycle": config.db_pool_recycle,
+    }
+    if config.db_pool_mode == "pooler":
+        # соединения держит PgBouncer; свой пул поверх него только удерживал бы их
+        options["poolclass"] = TimedNullPool if instrumented else NullPool
+        statement_cache_size = 0
+    else:
+        options.update(
+            pool_size=settings.POOL_SIZE,
+            max_overflow=settings.POOL_OVERFLOW,
+            pool_timeout=settings.POOL_TIMEOUT,
+        )
+        if instrumented:
+            options["poolclass"] = TimedQueuePool
+        statement_cache_size = config.db_statement_cache_size
+
+    if make_url(url).get_driver_name() == "asyncpg":
+        connect_args = {
+            # кэш самого asyncpg и кэш диалекта SQLAlchemy поверх него
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": statement_cache_size,
+        }
+        if config.db_pool_mode == "pooler":
+            # в режиме transaction следующий запрос может уйти в другое серверное
+            # соединение, где подготовленный запрос с тем же именем уже есть
+            connect_args["prepared_statement_name_func"] = _unique_statement_name
+        options["connect_args"] = connect_args
+    return options
+
+
+def create_engine(
+    url: str, config: Optional[DatabaseEngineConfig] = None
+) -> AsyncEngine:
+    """
+    Создает движок с учетом режима пула (settings.db_engine по умолчанию)
+    :param url:
+    :param config:
+    :return:
+    """
+    new_engine = create_async_engine(
+        url=url, **engine_options(url, config or settings.db_engine)
+    )
+    if settings.instrumentation.sql_instrumentation_enabled:
+        instrument_engine(new_engine)
+    return new_engine
+
+
+engine = create_engine(settings.DATABASE_URL)
+replica_engines = [create_engine(url) for url in settings.REPLICA_DATABASE_URLS]
+async_session_maker = make_session_maker(engine, replica_engines)
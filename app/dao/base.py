@@ -1,14 +1,62 @@
-from typing import TypeVar, Generic, Type, Any, Optional, List
+import enum
+import json
+from typing import (
+    TypeVar,
+    Generic,
+    Type,
+    Any,
+    AsyncIterator,
+    Optional,
+    List,
+    Literal,
+    Sequence,
+)
 
 from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import select, update, func, desc, asc
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    select,
+    insert,
+    update,
+    func,
+    desc,
+    asc,
+    tuple_,
+    text,
+    bindparam,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
+from app.core.config import settings
+from app.core.session import USE_REPLICA
+from app.dao.explain import Explain
+from app.dao.log import dao_logger, redact, redacted
+from app.dao.pagination import Page, decode_cursor, encode_cursor
+from app.dao.projection import projection_for
 from app.models.base import Base
+from app.schemas.pagination import CountResult
+from app.services.cache import TTLCache
 
 T = TypeVar("T", bound=Base)
+S = TypeVar("S", bound=BaseModel)
+
+CountMode = Literal["exact", "estimate", "auto", "cached"]
+
+# Готовые параметризованные запросы по (модель, вид, ключи фильтра, сортировка).
+# Повторное использование объекта запроса избавляет от его построения
+# и вычисления ключа кэша компиляции SQLAlchemy на каждом вызове.
+STATEMENT_CACHE_MAX_SIZE = 1000
+statement_cache: dict[tuple, Select] = {}
+
+# точные подсчеты по (таблица, фильтр) для режима cached
+count_cache: TTLCache[tuple[str, str], int] = TTLCache(
+    maxsize=settings.count.count_cache_max_size, ttl=settings.count.count_cache_ttl
+)
 
 
 class BaseDAO(Generic[T]):
@@ -29,47 +77,315 @@ class BaseDAO(Generic[T]):
         Создает новую запись
         """
         values_dict = data.model_dump(exclude_unset=True)
-        logger.debug(
-            f"Добавление записи {self.model.__name__} с данными: {values_dict}"
+        dao_logger.debug(
+            "Добавление записи {model} с данными: {values}",
+            model=self._model_name,
+            values=redacted(values_dict),
         )
         try:
             new_instance = self.model(**values_dict)
             self._session.add(new_instance)
-            logger.debug(f"Запись {self.model.__name__} успешно добавлена")
+            dao_logger.debug("Запись {model} успешно добавлена", model=self._model_name)
             await self._session.flush()
             return new_instance
         except SQLAlchemyError as e:
             logger.error(f"Ошибка создания {self.model.__name__}: {e}")
             raise
 
-    async def create_batch(self, batch: List[BaseModel]) -> list[T]:
+    def _model_name(self) -> str:
+        return self.model.__name__
+
+    def _cached_statement(
+        self,
+        kind: Literal["select", "count"] | Type[BaseModel],
+        filter_dict: dict,
+        order_by_field: Optional[str] = None,
+        order_desc: bool = False,
+        paginate: bool = False,
+    ) -> tuple[Select, dict]:
+        """
+        Возвращает готовый запрос с параметрами вместо значений фильтра и значения параметров.
+        Фильтр по None превращается в IS NULL, поэтому входит в ключ кэша.
+        :param kind: select - записи модели, count - их число,
+            схема Pydantic - только нужные схеме колонки (см. find_as)
+        :param filter_dict:
+        :param order_by_field:
+        :param order_desc:
+        :param paginate: добавить OFFSET/LIMIT параметрами offset и limit
+        :return: (запрос, параметры)
+        """
+        key = (
+            self.model,
+            kind,
+            tuple(sorted((field, value is None) for field, value in filter_dict.items())),
+            order_by_field,
+            order_desc,
+            paginate,
+        )
+        stmt = statement_cache.get(key)
+        if stmt is None:
+            stmt = self._build_statement(
+                kind, key[2], order_by_field, order_desc, paginate
+            )
+            if len(statement_cache) < STATEMENT_CACHE_MAX_SIZE:
+                statement_cache[key] = stmt
+        params = {
+            f"f_{field}": value
+            for field, value in filter_dict.items()
+            if value is not None
+        }
+        return stmt, params
+
+    def _build_statement(
+        self,
+        kind: str | Type[BaseModel],
+        filter_fields: tuple[tuple[str, bool], ...],
+        order_by_field: Optional[str],
+        order_desc: bool,
+        paginate: bool,
+    ) -> Select:
+        criteria = {
+            field: None if is_none else bindparam(f"f_{field}")
+            for field, is_none in filter_fields
+        }
+        # чтения могут обслуживаться репликой (см. RoutingSession)
+        if kind == "count":
+            return (
+                select(func.count())
+                .select_from(self.model)
+                .filter_by(**criteria)
+                .execution_options(**{USE_REPLICA: True})
+            )
+
+        stmt = (
+            select(self.model)
+            .filter_by(**criteria)
+            .execution_options(**{USE_REPLICA: True})
+        )
+        if kind != "select":
+            # фильтр уже привязан к модели, поэтому join не меняет его цель
+            projection = projection_for(self.model, kind)
+            stmt = stmt.with_only_columns(*projection.columns).select_from(self.model)
+            for relationship in projection.joins:
+                stmt = stmt.outerjoin(relationship.class_attribute)
+        if order_by_field:
+            field = getattr(self.model, order_by_field, None)
+            if field:
+                stmt = stmt.order_by(desc(field) if order_desc else asc(field))
+        if paginate:
+            stmt = stmt.offset(bindparam("offset")).limit(bindparam("limit"))
+        return stmt
+
+    def _projection_options(
+        self,
+        columns: Optional[Sequence[str]],
+        schema: Optional[Type[BaseModel]],
+    ) -> list[Any]:
+        """
+        Options, ограничивающие загрузку объектов колонками из columns
+        или колонками и связями, нужными схеме. Первичный ключ загружается всегда,
+        обращение к незагруженному атрибуту вызывает ошибку, а не запрос к БД
+        (неявная подгрузка в async-сессии невозможна).
+        :param columns: имена колонок модели
+        :param schema: схема Pydantic, которая будет построена из объектов
+        :return:
+        """
+        if columns:
+            return [
+                load_only(*(getattr(self.model, c) for c in columns), raiseload=True)
+            ]
+        if schema is not None:
+            return projection_for(self.model, schema).load_options
+        return []
+
+    def _dialect_insert(self):
+        """
+        INSERT с поддержкой ON CONFLICT для диалекта текущей сессии
+        """
+        dialect = self._session.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(self.model)
+        if dialect == "sqlite":
+            return sqlite.insert(self.model)
+        raise ValueError(f"ON CONFLICT не поддерживается для диалекта {dialect}")
+
+    async def insert_or_ignore(
+        self, data: BaseModel, conflict_columns: Optional[Sequence[str]] = None
+    ) -> T | None:
+        """
+        Вставляет запись одним запросом (INSERT ... ON CONFLICT DO NOTHING RETURNING).
+        :param data:
+        :param conflict_columns: колонки уникального ограничения; по умолчанию любое
+        :return: созданная запись или None, если она нарушила ограничение
+        """
+        values_dict = data.model_dump(exclude_unset=True)
+        dao_logger.debug(
+            "Добавление записи {model} без перезаписи: {values}",
+            model=self._model_name,
+            values=redacted(values_dict),
+        )
+        try:
+            stmt = (
+                self._dialect_insert()
+                .values(**values_dict)
+                .on_conflict_do_nothing(index_elements=conflict_columns)
+                .returning(self.model)
+            )
+            result = await self._session.execute(stmt)
+            record = result.scalar_one_or_none()
+            dao_logger.debug(
+                "Запись {model} {status}",
+                model=self._model_name,
+                status=lambda: "добавлена" if record else "уже существует",
+            )
+            return record
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка добавления {self.model.__name__}: {e}")
+            raise
+
+    async def upsert(
+        self,
+        data: BaseModel,
+        conflict_columns: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+    ) -> T:
         """
-        Добавляет несколько записей
+        Вставляет запись или обновляет существующую одним запросом
+        (INSERT ... ON CONFLICT DO UPDATE RETURNING).
+        :param data:
+        :param conflict_columns: колонки уникального ограничения
+        :param update_fields: обновляемые поля; по умолчанию все переданные, кроме conflict_columns
+        :return:
+        """
+        values_dict = data.model_dump(exclude_unset=True)
+        if update_fields is None:
+            update_fields = [f for f in values_dict if f not in conflict_columns]
+        dao_logger.debug(
+            "Upsert {model} по {conflict_columns}: {values}",
+            model=self._model_name,
+            conflict_columns=lambda: conflict_columns,
+            values=redacted(values_dict),
+        )
+        try:
+            stmt = self._dialect_insert().values(**values_dict)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={field: stmt.excluded[field] for field in update_fields},
+            ).returning(self.model)
+            result = await self._session.execute(
+                stmt, execution_options={"populate_existing": True}
+            )
+            return result.scalar_one()
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка upsert {self.model.__name__}: {e}")
+            raise
+
+    async def create_batch(
+        self,
+        batch: List[BaseModel],
+        bulk: bool = False,
+        return_instances: bool = True,
+    ) -> list[T] | int:
+        """
+        Добавляет несколько записей.
+        По умолчанию записи создаются как ORM-объекты через unit of work.
+        В режиме bulk строки отправляются пачками без ORM-объектов:
+        на Postgres без return_instances - через COPY (copy_records_to_table),
+        иначе - многострочными INSERT ... VALUES (с RETURNING при return_instances).
         :param batch:
+        :param bulk: массовая загрузка для тысяч строк
+        :param return_instances: вернуть созданные записи, иначе только их число
         :return:
         """
         data_list = [_.model_dump(exclude_unset=True) for _ in batch]
-        logger.debug(
-            f"Добавление списка записей {self.model.__name__}: [{len(data_list)}]"
+        dao_logger.debug(
+            "Добавление списка записей {model}: [{count}]",
+            model=self._model_name,
+            count=data_list.__len__,
         )
+        if not data_list:
+            return [] if return_instances else 0
         try:
+            if bulk:
+                return await self._bulk_insert(data_list, return_instances)
+
             new_instances = [self.model(**_) for _ in data_list]
             self._session.add_all(new_instances)
-            logger.debug(f"добавлено {len(new_instances)} записей")
+            dao_logger.debug("добавлено {count} записей", count=new_instances.__len__)
             await self._session.flush()
-            return new_instances
+            return new_instances if return_instances else len(new_instances)
         except SQLAlchemyError as e:
             logger.error(f"Ошибка добавления списка записей {self.model.__name__}: {e}")
             raise
 
+    async def _bulk_insert(
+        self, data_list: list[dict], return_instances: bool
+    ) -> list[T] | int:
+        if (
+            not return_instances
+            and self._session.get_bind().dialect.name == "postgresql"
+        ):
+            return await self._copy_records(data_list)
+
+        # insertmanyvalues: SQLAlchemy сам собирает многострочные VALUES пачками
+        stmt = insert(self.model)
+        if return_instances:
+            result = await self._session.execute(stmt.returning(self.model), data_list)
+            records = list(result.scalars().all())
+            dao_logger.debug("добавлено {count} записей", count=records.__len__)
+            return records
+        await self._session.execute(stmt, data_list)
+        dao_logger.debug("добавлено {count} записей", count=data_list.__len__)
+        return len(data_list)
+
+    async def _copy_records(self, data_list: list[dict]) -> int:
+        """
+        Загружает строки через COPY в транзакции текущей сессии.
+        Неуказанные колонки получают скалярные default модели или server_default.
+        """
+        table = self.model.__table__
+        defaults = {
+            column.key: column.default.arg
+            for column in table.columns
+            if column.default is not None and column.default.is_scalar
+        }
+        # COPY требует одинаковый набор колонок, строки группируются по нему
+        groups: dict[tuple[str, ...], list[tuple]] = {}
+        for data in data_list:
+            row = {**defaults, **data}
+            columns = tuple(sorted(row))
+            groups.setdefault(columns, []).append(
+                tuple(
+                    v.name if isinstance(v, enum.Enum) else v
+                    for v in (row[c] for c in columns)
+                )
+            )
+
+        connection = await self._session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        for columns, records in groups.items():
+            await driver_connection.copy_records_to_table(
+                table.name,
+                records=records,
+                columns=[table.columns[c].name for c in columns],
+                schema_name=table.schema,
+            )
+        dao_logger.debug(
+            "Загружено {count} записей через COPY", count=data_list.__len__
+        )
+        return len(data_list)
+
     async def find_by_id(self, pk: Any) -> T | None:
         """
         Получает запись по PK
         """
         try:
             result = await self._session.get(self.model, pk)
-            message = f"Запись {'найдена' if result else 'не найдена'}"
-            logger.debug(message)
+            dao_logger.debug(
+                "Запись {status}",
+                status=lambda: "найдена" if result else "не найдена",
+            )
             return result
         except SQLAlchemyError as e:
             logger.error(f"Ошибка получения {self.model.__name__} по ID={pk}: {e}")
@@ -82,6 +398,9 @@ class BaseDAO(Generic[T]):
         filter_dict: Optional[dict] = None,
         order_by_field: str = None,
         order_desc: bool = False,
+        columns: Optional[Sequence[str]] = None,
+        schema: Optional[Type[BaseModel]] = None,
+        use_replica: bool = True,
     ) -> T | None:
         """
         Ищет одну запись по фильтру
@@ -90,35 +409,41 @@ class BaseDAO(Generic[T]):
         :param options:
         :param filter_dict:
         :param filter:
+        :param columns: загрузить только эти колонки (см. _projection_options)
+        :param schema: загрузить только то, что нужно схеме
+        :param use_replica: False - читать с основной БД, когда отставание реплики
+            недопустимо (только что созданная или удаленная запись)
         :return:
         """
         if filter is None and filter_dict is None:
             raise ValueError("Задайте значение для filter или filter_dict")
         if filter_dict is None and filter is not None:
             filter_dict = filter.model_dump(exclude_unset=True)
-        logger.debug(
-            f"Поиск (одной) записи {self.model.__name__} по фильтру: {filter_dict}"
+        dao_logger.debug(
+            "Поиск (одной) записи {model} по фильтру: {filter}",
+            model=self._model_name,
+            filter=redacted(filter_dict),
         )
         try:
-            stmt = select(self.model).filter_by(**filter_dict)
-            if order_by_field:
-                field = getattr(self.model, order_by_field, None)
-                if field:
-                    if order_desc:
-                        stmt = stmt.order_by(desc(field))
-                    else:
-                        stmt = stmt.order_by(asc(field))
-
+            stmt, params = self._cached_statement(
+                "select", filter_dict, order_by_field, order_desc
+            )
+            options = [*(options or ()), *self._projection_options(columns, schema)]
             if options:
                 stmt = stmt.options(*options)
-            result = await self._session.execute(stmt)
+            if not use_replica:
+                stmt = stmt.execution_options(**{USE_REPLICA: False})
+            result = await self._session.execute(stmt, params)
             record = result.scalar_one_or_none()
-            message = f"Запись {'найдена' if record else 'не найдена'} по фильтру: {filter_dict}"
-            logger.debug(message)
+            dao_logger.debug(
+                "Запись {status} по фильтру: {filter}",
+                status=lambda: "найдена" if record else "не найдена",
+                filter=redacted(filter_dict),
+            )
             return record
         except SQLAlchemyError as e:
             logger.error(
-                f"Ошибка поиска {self.model.__name__} по фильтру: {filter_dict}: {e}"
+                f"Ошибка поиска {self.model.__name__} по фильтру: {redact(filter_dict)}: {e}"
             )
             raise
 
@@ -129,38 +454,258 @@ class BaseDAO(Generic[T]):
         filter: Optional[BaseModel] = None,
         filter_dict: Optional[dict] = None,
         options: List[Any] = None,
+        columns: Optional[Sequence[str]] = None,
+        schema: Optional[Type[BaseModel]] = None,
     ) -> list[T]:
         """
-        Получает список объектов по фильтру и пагинации
+        Получает список объектов по фильтру и пагинации.
+        columns или schema ограничивают загружаемые колонки (см. _projection_options)
+        """
+
+        if filter_dict is None:
+            filter_dict = filter.model_dump(exclude_unset=True) if filter else {}
+        dao_logger.debug(
+            "Поиск всех записей {model} по фильтру: {filter}; offset: {offset}, limit: {limit}",
+            model=self._model_name,
+            filter=redacted(filter_dict),
+            offset=lambda: offset,
+            limit=lambda: limit,
+        )
+        try:
+            stmt, params = self._cached_statement("select", filter_dict, paginate=True)
+            options = [*(options or ()), *self._projection_options(columns, schema)]
+            if options:
+                stmt = stmt.options(*options)
+            result = await self._session.execute(
+                stmt, {**params, "offset": offset, "limit": limit}
+            )
+            records = list(result.scalars().all())
+            dao_logger.debug("Найдено {count} записей", count=records.__len__)
+            return records
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка получения списка {self.model.__name__}: {e}")
+            raise
+
+    async def find_as(
+        self,
+        schema: Type[S],
+        offset: int = 0,
+        limit: int = 100,
+        filter: Optional[BaseModel] = None,
+        filter_dict: Optional[dict] = None,
+        order_by_field: str = None,
+        order_desc: bool = False,
+        use_replica: bool = True,
+    ) -> list[S]:
+        """
+        Получает записи сразу в виде схем Pydantic, только для чтения.
+        Выбираются лишь колонки, нужные схеме, строки результата валидируются
+        в схему без создания ORM-объектов и без identity map сессии.
+        Поле схемы сопоставляется колонке по имени или validation_alias,
+        вложенная схема - связи многие-к-одному с тем же именем (LEFT JOIN).
+        :param schema:
+        :param offset:
+        :param limit:
+        :param filter:
+        :param filter_dict:
+        :param order_by_field:
+        :param order_desc:
+        :param use_replica: False - читать с основной БД (см. find_one_or_none)
+        :return:
         """
+        if filter_dict is None:
+            filter_dict = filter.model_dump(exclude_unset=True) if filter else {}
+        dao_logger.debug(
+            "Поиск записей {model} как {schema} по фильтру: {filter}; offset: {offset}, limit: {limit}",
+            model=self._model_name,
+            schema=lambda: schema.__name__,
+            filter=redacted(filter_dict),
+            offset=lambda: offset,
+            limit=lambda: limit,
+        )
+        try:
+            stmt, params = self._cached_statement(
+                schema, filter_dict, order_by_field, order_desc, paginate=True
+            )
+            if not use_replica:
+                stmt = stmt.execution_options(**{USE_REPLICA: False})
+            result = await self._session.execute(
+                stmt, {**params, "offset": offset, "limit": limit}
+            )
+            projection = projection_for(self.model, schema)
+            records = [projection.to_schema(row) for row in result]
+            dao_logger.debug("Найдено {count} записей", count=records.__len__)
+            return records
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка получения списка {self.model.__name__}: {e}")
+            raise
 
+    async def stream(
+        self,
+        filter: Optional[BaseModel] = None,
+        filter_dict: Optional[dict] = None,
+        options: List[Any] = None,
+        order_by_field: str = None,
+        order_desc: bool = False,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[T]:
+        """
+        Перебирает записи по фильтру, не загружая весь результат в память:
+        строки читаются курсором на сервере пачками по chunk_size.
+        Не изменяйте записи во время перебора: измененные объекты удерживаются
+        сессией до flush. joinedload коллекций с пачками несовместим, используйте selectinload.
+        При досрочном выходе из цикла оборачивайте вызов в contextlib.aclosing,
+        чтобы курсор закрылся сразу, а не при сборке мусора.
+        :param filter:
+        :param filter_dict:
+        :param options:
+        :param order_by_field:
+        :param order_desc:
+        :param chunk_size:
+        :return:
+        """
         if filter_dict is None:
             filter_dict = filter.model_dump(exclude_unset=True) if filter else {}
-        logger.debug(
-            f"Поиск всех записей {self.model.__name__} по фильтру: {filter_dict}; offset: {offset}, limit: {limit}"
+        dao_logger.debug(
+            "Потоковое чтение {model} по фильтру: {filter}; пачка: {chunk_size}",
+            model=self._model_name,
+            filter=redacted(filter_dict),
+            chunk_size=lambda: chunk_size,
+        )
+        stmt = (
+            select(self.model)
+            .filter_by(**filter_dict)
+            .execution_options(yield_per=chunk_size, **{USE_REPLICA: True})
+        )
+        if order_by_field:
+            field = getattr(self.model, order_by_field)
+            stmt = stmt.order_by(desc(field) if order_desc else asc(field))
+        if options:
+            stmt = stmt.options(*options)
+        try:
+            result = await self._session.stream_scalars(stmt)
+            try:
+                async for record in result:
+                    yield record
+            finally:
+                await result.close()
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка потокового чтения {self.model.__name__}: {e}")
+            raise
+
+    async def find_page(
+        self,
+        order_by: Sequence[str] = (),
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filter: Optional[BaseModel] = None,
+        filter_dict: Optional[dict] = None,
+        options: List[Any] = None,
+        order_desc: bool = False,
+        where: Sequence[ColumnElement[bool]] = (),
+    ) -> Page[T]:
+        """
+        Получает страницу записей keyset-пагинацией: вместо OFFSET условие
+        (колонки сортировки) > (значения из курсора), поэтому стоимость страницы
+        не зависит от ее номера при наличии индекса по колонкам сортировки.
+        К order_by добавляется первичный ключ, чтобы порядок был однозначным.
+        Колонки сортировки должны быть NOT NULL.
+        :param order_by: имена колонок сортировки
+        :param cursor: next_cursor предыдущей страницы
+        :param limit:
+        :param filter:
+        :param filter_dict:
+        :param options:
+        :param order_desc:
+        :param where: условия, которые не выразить равенством в filter_dict
+            (диапазоны, подзапросы)
+        :return:
+        """
+        if filter_dict is None:
+            filter_dict = filter.model_dump(exclude_unset=True) if filter else {}
+        columns = self._keyset_columns(order_by)
+        dao_logger.debug(
+            "Поиск страницы {model} по фильтру: {filter}; сортировка: {order_by}, limit: {limit}",
+            model=self._model_name,
+            filter=redacted(filter_dict),
+            order_by=lambda: [c.key for c in columns],
+            limit=lambda: limit,
         )
         try:
             stmt = (
-                select(self.model).filter_by(**filter_dict).offset(offset).limit(limit)
+                select(self.model)
+                .filter_by(**filter_dict)
+                .where(*where)
+                .execution_options(**{USE_REPLICA: True})
             )
+            if cursor:
+                stmt = stmt.where(self._keyset_after(columns, cursor, order_desc))
+            stmt = stmt.order_by(
+                *(desc(c) if order_desc else asc(c) for c in columns)
+            ).limit(limit + 1)
             if options:
                 stmt = stmt.options(*options)
             result = await self._session.execute(stmt)
             records = list(result.scalars().all())
-            logger.debug(f"Найдено {len(records)} записей")
-            return records
+
+            next_cursor = None
+            if len(records) > limit:
+                records = records[:limit]
+                last = records[-1]
+                next_cursor = encode_cursor(
+                    columns, [getattr(last, c.key) for c in columns]
+                )
+            dao_logger.debug("Найдено {count} записей", count=records.__len__)
+            return Page(items=records, next_cursor=next_cursor)
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка получения списка {self.model.__name__}: {e}")
+            logger.error(f"Ошибка получения страницы {self.model.__name__}: {e}")
             raise
 
+    def _keyset_columns(self, order_by: Sequence[str]) -> list:
+        """
+        Колонки keyset-сортировки: order_by и первичный ключ для однозначного порядка
+        :param order_by: имена колонок
+        :return:
+        """
+        column_attrs = self.model.__mapper__.column_attrs
+        unknown = [name for name in order_by if name not in column_attrs]
+        if unknown:
+            raise ValueError(
+                f"Сортировка по неизвестным колонкам {self._model_name}: {unknown}"
+            )
+        columns = [getattr(self.model, name) for name in order_by]
+        columns += [
+            pk for pk in self.model.__mapper__.primary_key if pk.key not in order_by
+        ]
+        return columns
+
+    @staticmethod
+    def _keyset_after(
+        columns: Sequence[ColumnElement], cursor: str, order_desc: bool
+    ) -> ColumnElement[bool]:
+        """
+        Условие "после курсора": (колонки сортировки) > (значения из курсора)
+        или < при сортировке по убыванию
+        :param columns: колонки из _keyset_columns
+        :param cursor: next_cursor предыдущей страницы
+        :param order_desc:
+        :return:
+        """
+        key = tuple_(*columns)
+        after = tuple_(*decode_cursor(columns, cursor), types=[c.type for c in columns])
+        return key < after if order_desc else key > after
+
     async def update(self, filters: BaseModel, data: BaseModel) -> list[T]:
         """
         Обновляет записи по фильтру
         """
         filter_dict = filters.model_dump(exclude_unset=True)
         values_dict = data.model_dump(exclude_unset=True)
-        logger.debug(
-            f"Обновление {self.model.__name__} по фильтру {filter_dict} с данными {values_dict}"
+        dao_logger.debug(
+            "Обновление {model} по фильтру {filter} с данными {values}",
+            model=self._model_name,
+            filter=redacted(filter_dict),
+            values=redacted(values_dict),
         )
 
         try:
@@ -177,7 +722,9 @@ class BaseDAO(Generic[T]):
             )
             result = await self._session.execute(stmt)
             updated_records = list(result.scalars().all())
-            logger.debug(f"Обновлено {len(updated_records)} записей")
+            dao_logger.debug(
+                "Обновлено {count} записей", count=updated_records.__len__
+            )
             await self._session.flush()
             return updated_records
         except SQLAlchemyError as e:
@@ -192,11 +739,82 @@ class BaseDAO(Generic[T]):
         if filter_dict is None and filters is not None:
             filter_dict = filters.model_dump(exclude_unset=True)
 
+        return await self._exact_count(filter_dict)
+
+    async def get_count(
+        self,
+        filters: Optional[BaseModel] = None,
+        filter_dict: Optional[dict] = None,
+        mode: CountMode = "exact",
+    ) -> CountResult:
+        """
+        Подсчитывает записи с указанием, точное ли число.
+        exact - SELECT count(*);
+        estimate - оценка планировщика Postgres: pg_class.reltuples без фильтра,
+        строки из EXPLAIN с фильтром (на других СУБД - точный подсчет);
+        auto - оценка, но точный подсчет, если оценка меньше count_exact_threshold;
+        cached - точный подсчет, закэшированный по фильтру на count_cache_ttl секунд.
+        :param filters:
+        :param filter_dict:
+        :param mode:
+        :return:
+        """
+        if filter_dict is None:
+            filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
+
+        if mode == "cached":
+            key = (self.model.__tablename__, repr(sorted(filter_dict.items())))
+            value = count_cache.get(key)
+            if value is None:
+                value = await self._exact_count(filter_dict)
+                count_cache.set(key, value)
+            return CountResult(value=value, exact=True)
+
+        if mode in ("estimate", "auto"):
+            estimate = await self._estimate_count(filter_dict)
+            if estimate is not None and (
+                mode == "estimate"
+                or estimate >= settings.count.count_exact_threshold
+            ):
+                return CountResult(value=estimate, exact=False)
+
+        return CountResult(value=await self._exact_count(filter_dict), exact=True)
+
+    async def _exact_count(self, filter_dict: dict) -> int:
         try:
-            stmt = select(func.count()).select_from(self.model).filter_by(**filter_dict)
-            result = await self._session.execute(stmt)
-            count_value = result.scalar_one()
-            return count_value
+            stmt, params = self._cached_statement("count", filter_dict)
+            result = await self._session.execute(stmt, params)
+            return result.scalar_one()
         except SQLAlchemyError as e:
             logger.error(f"Ошибка подсчёта {self.model.__name__}: {e}")
             raise
+
+    async def _estimate_count(self, filter_dict: dict) -> Optional[int]:
+        """
+        Оценка числа строк планировщиком Postgres, None если оценка недоступна
+        """
+        dialect = self._session.get_bind().dialect
+        if dialect.name != "postgresql":
+            return None
+        try:
+            if not filter_dict:
+                result = await self._session.execute(
+                    text(
+                        "SELECT reltuples::bigint FROM pg_class "
+                        "WHERE oid = to_regclass(:table)"
+                    ),
+                    {"table": self.model.__tablename__},
+                )
+                estimate = result.scalar_one_or_none()
+                # -1: таблица еще не анализировалась
+                return estimate if estimate is not None and estimate >= 0 else None
+
+            stmt = Explain(select(self.model).filter_by(**filter_dict))
+            result = await self._session.execute(stmt)
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка оценки числа записей {self.model.__name__}: {e}")
+            raise
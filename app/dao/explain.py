@@ -0,0 +1,19 @@
+from sqlalchemy import ClauseElement, Executable
+from sqlalchemy.ext.compiler import compiles
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) для запроса. Запрос компилируется тем же компилятором,
+    поэтому значения фильтров остаются связанными параметрами, а не вставляются в SQL
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement: Executable):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
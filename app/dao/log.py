@@ -0,0 +1,36 @@
+"""
+Логирование DAO.
+
+Сообщения формируются лениво: все аргументы dao_logger - функции, которые
+вызываются, только если хотя бы один обработчик принимает уровень сообщения.
+При выключенном DEBUG вызов стоит одну проверку уровня внутри loguru.
+Именованные аргументы попадают в record["extra"] и доступны для структурных логов.
+"""
+
+from typing import Any, Callable, Mapping, Optional
+
+from loguru import logger
+
+SENSITIVE_FIELDS = frozenset({"password", "refresh_token_hash", "fingerprint"})
+REDACTED = "***"
+
+dao_logger = logger.opt(lazy=True)
+
+
+def redact(data: Optional[Mapping[str, Any]]) -> dict:
+    """
+    Копия данных фильтра/записи со скрытыми значениями чувствительных полей
+    """
+    if not data:
+        return {}
+    return {
+        key: REDACTED if key in SENSITIVE_FIELDS else value
+        for key, value in data.items()
+    }
+
+
+def redacted(data: Optional[Mapping[str, Any]]) -> Callable[[], dict]:
+    """
+    Ленивый аргумент для dao_logger: redact выполняется только при записи сообщения
+    """
+    return lambda: redact(data)
@@ -0,0 +1,106 @@
+import base64
+import binascii
+import datetime
+import decimal
+import enum
+import json
+import uuid
+from dataclasses import dataclass
+from typing import Any, Generic, Optional, Sequence, TypeVar
+
+from sqlalchemy import ColumnElement
+
+from app.core.exceptions import InvalidCursorException
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    """
+    Страница keyset-пагинации.
+    next_cursor передается в следующий запрос; None означает последнюю страницу.
+    """
+
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    return value
+
+
+def _from_json(column: ColumnElement, value: Any) -> Any:
+    """
+    Восстанавливает значение колонки из JSON курсора.
+    Значение неподходящего типа - TypeError/ValueError: курсор подделан или выдан
+    для другой схемы, и до базы такое значение доходить не должно
+    """
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if issubclass(python_type, bool):
+        if not isinstance(value, bool):
+            raise TypeError(f"{column.key}: ожидался bool")
+        return value
+    if issubclass(python_type, (int, float)) and not issubclass(python_type, enum.Enum):
+        allowed = int if issubclass(python_type, int) else (int, float)
+        if isinstance(value, bool) or not isinstance(value, allowed):
+            raise TypeError(f"{column.key}: ожидался {python_type.__name__}")
+        return python_type(value)
+    if issubclass(python_type, enum.Enum):
+        return python_type(value)
+    if not isinstance(value, str):
+        raise TypeError(f"{column.key}: ожидалась строка")
+    if issubclass(python_type, (datetime.date, datetime.time)):
+        return python_type.fromisoformat(value)
+    if issubclass(python_type, decimal.Decimal):
+        try:
+            return decimal.Decimal(value)
+        except decimal.InvalidOperation:
+            raise ValueError(f"{column.key}: ожидалось число")
+    if issubclass(python_type, (uuid.UUID, str)):
+        return python_type(value)
+    return value
+
+
+def encode_cursor(columns: Sequence[ColumnElement], values: Sequence[Any]) -> str:
+    """
+    Кодирует значения колонок сортировки последней записи в непрозрачный курсор.
+    Имена колонок сохраняются, чтобы курсор нельзя было применить к другой сортировке.
+    :param columns:
+    :param values:
+    :return:
+    """
+    payload = {"k": [c.key for c in columns], "v": [_to_json(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(columns: Sequence[ColumnElement], cursor: str) -> tuple:
+    """
+    Разбирает курсор, выданный encode_cursor для тех же колонок
+    :param columns:
+    :param cursor:
+    :return: значения колонок сортировки
+    """
+    try:
+        raw = base64.b64decode(
+            cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True
+        )
+        payload = json.loads(raw)
+        keys, values = payload["k"], payload["v"]
+        if keys != [c.key for c in columns] or len(values) != len(columns):
+            raise InvalidCursorException
+        return tuple(_from_json(c, v) for c, v in zip(columns, values))
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursorException
@@ -0,0 +1,143 @@
+import inspect
+from dataclasses import dataclass
+from typing import Any, Optional, Type, get_args
+
+from pydantic import AliasChoices, BaseModel
+from pydantic.fields import FieldInfo
+from sqlalchemy import ColumnElement, Row
+from sqlalchemy.orm import RelationshipProperty, joinedload, load_only
+
+# разделитель в метках колонок вложенных схем: role__name
+NESTED_SEPARATOR = "__"
+
+
+@dataclass
+class Projection:
+    """
+    Колонки, которые нужны схеме, и сборка схемы из строки результата.
+    Вложенная схема (например, UserInfo.role) читается через LEFT JOIN
+    связи многие-к-одному с тем же именем, что и поле.
+    """
+
+    schema: Type[BaseModel]
+    columns: list[ColumnElement]
+    joins: list[RelationshipProperty]
+    # ключ данных схемы -> ключи вложенной схемы (None для обычной колонки).
+    # Ключ - имя поля или его validation_alias, совпавший с колонкой
+    fields: dict[str, Optional[tuple[str, ...]]]
+    # options для ORM-запроса: load_only по тем же колонкам и joinedload связей
+    load_options: list[Any]
+
+    def to_schema(self, row: Row) -> BaseModel:
+        mapping = row._mapping
+        data = {}
+        for name, nested in self.fields.items():
+            if nested is None:
+                data[name] = mapping[name]
+                continue
+            values = {
+                field: mapping[f"{name}{NESTED_SEPARATOR}{field}"] for field in nested
+            }
+            # все колонки NULL - связанной записи нет
+            data[name] = None if all(v is None for v in values.values()) else values
+        return self.schema.model_validate(data)
+
+
+# проекции по (модель, схема); набор моделей и схем конечен
+projections: dict[tuple[type, type], Projection] = {}
+
+
+def projection_for(model: type, schema: Type[BaseModel]) -> Projection:
+    """
+    Возвращает (и кэширует) проекцию модели на схему
+    :param model:
+    :param schema:
+    :return:
+    """
+    projection = projections.get((model, schema))
+    if projection is None:
+        projection = _build_projection(model, schema)
+        projections[(model, schema)] = projection
+    return projection
+
+
+def _build_projection(model: type, schema: Type[BaseModel]) -> Projection:
+    mapper = model.__mapper__
+    columns, joins, fields = [], [], {}
+    attributes, load_options = [], []
+    for name, field in schema.model_fields.items():
+        key, column = _find_column(model, name, field)
+        if column is not None:
+            columns.append(column.label(key))
+            attributes.append(column)
+            fields[key] = None
+            continue
+
+        relationship = mapper.relationships.get(name)
+        nested_schema = _nested_schema(field.annotation)
+        if relationship is not None and not relationship.uselist and nested_schema:
+            target = relationship.mapper.class_
+            nested, nested_attributes = [], []
+            for nested_name, nested_field in nested_schema.model_fields.items():
+                nested_key, nested_column = _find_column(
+                    target, nested_name, nested_field
+                )
+                if nested_column is None:
+                    raise ValueError(
+                        f"Поле {nested_schema.__name__}.{nested_name} "
+                        f"не найдено в модели {target.__name__}"
+                    )
+                columns.append(
+                    nested_column.label(f"{name}{NESTED_SEPARATOR}{nested_key}")
+                )
+                nested.append(nested_key)
+                nested_attributes.append(nested_column)
+            joins.append(relationship)
+            load_options.append(
+                joinedload(relationship.class_attribute).load_only(
+                    *nested_attributes, raiseload=True
+                )
+            )
+            fields[name] = tuple(nested)
+            continue
+
+        if field.is_required():
+            raise ValueError(
+                f"Поле {schema.__name__}.{name} не найдено в модели {model.__name__}"
+            )
+    load_options.insert(0, load_only(*attributes, raiseload=True))
+    return Projection(
+        schema=schema,
+        columns=columns,
+        joins=joins,
+        fields=fields,
+        load_options=load_options,
+    )
+
+
+def _find_column(
+    model: type, name: str, field: FieldInfo
+) -> tuple[Optional[str], Optional[Any]]:
+    """
+    Колонка модели для поля схемы: по имени поля или по одному из его
+    validation_alias (AliasChoices), если имя поля и колонки различаются
+    :return: (ключ для валидации схемы, колонка) или (None, None)
+    """
+    candidates = [name]
+    alias = field.validation_alias
+    if isinstance(alias, str):
+        candidates.append(alias)
+    elif isinstance(alias, AliasChoices):
+        candidates += [choice for choice in alias.choices if isinstance(choice, str)]
+    column_attrs = model.__mapper__.column_attrs
+    for candidate in candidates:
+        if candidate in column_attrs:
+            return candidate, getattr(model, candidate)
+    return None, None
+
+
+def _nested_schema(annotation: Any) -> Optional[Type[BaseModel]]:
+    for candidate in (annotation, *get_args(annotation)):
+        if inspect.isclass(candidate) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
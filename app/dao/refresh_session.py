@@ -1,61 +1,109 @@
 from typing import Optional
 
+from sqlalchemy import delete, select, Row
+
 from app.dao.base import BaseDAO
 from app.models.refresh_session import RefreshSession
 from app.schemas.token import TokenSession
+from app.services.crypto import CryptoService
 
 
 class RefreshSessionDAO(BaseDAO):
+    """
+    Методы, изменяющие сессии, не делают commit: транзакцию завершает вызывающий код,
+    поэтому ротация токенов укладывается в одну транзакцию.
+    """
+
     model = RefreshSession
 
     async def get_session_by_refresh_token(
         self, refresh_token: str
     ) -> Optional[RefreshSession]:
+        """
+        Ищет сессию по дайджесту токена (уникальный индекс).
+        Читает с основной БД: реплика может еще видеть отозванную сессию
+        или не видеть только что выданную
+        :param refresh_token:
+        :return:
+        """
         return await self.find_one_or_none(
-            filter_dict={"refresh_token": refresh_token},
-            order_by_field="created_at",
-            order_desc=True,
+            filter_dict={"refresh_token_hash": CryptoService.hash_token(refresh_token)},
+            use_replica=False,
         )
 
-    async def delete_session(self, session: RefreshSession):
-        await self._session.delete(session)
-        await self._session.commit()
+    async def pop_session_by_refresh_token(self, refresh_token: str) -> Optional[Row]:
+        """
+        Удаляет сессию по токену одним DELETE ... RETURNING.
+        Токен можно использовать только один раз, даже при параллельных запросах.
+        :param refresh_token:
+        :return: (user_id, fingerprint) удаленной сессии или None
+        """
+        stmt = (
+            delete(self.model)
+            .where(
+                self.model.refresh_token_hash == CryptoService.hash_token(refresh_token)
+            )
+            .returning(self.model.user_id, self.model.fingerprint)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.one_or_none()
 
-    async def delete_all_user_sessions(self, user_id: int):
+    async def delete_all_user_sessions(self, user_id: int) -> int:
         """
         Удаляем все сессии пользователя
         :param user_id:
-        :return:
+        :return: число удаленных сессий
         """
-        all_sessions = await self.find(filter_dict={"user_id": user_id})
-        for session in all_sessions:
-            await self._session.delete(session)
-        await self._session.commit()
+        stmt = (
+            delete(self.model)
+            .where(self.model.user_id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.rowcount
 
-    async def delete_last_session_for_token(self, token: str):
-        session = await self.get_session_by_refresh_token(token)
-        if not session:
-            return
-        await self._session.delete(session)
-        await self._session.commit()
+    async def delete_all_sessions_for_token(self, refresh_token: str) -> int:
+        """
+        Удаляет все сессии владельца токена
+        :param refresh_token:
+        :return: число удаленных сессий
+        """
+        owner = (
+            select(self.model.user_id)
+            .where(
+                self.model.refresh_token_hash == CryptoService.hash_token(refresh_token)
+            )
+            .scalar_subquery()
+        )
+        stmt = (
+            delete(self.model)
+            .where(self.model.user_id == owner)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.rowcount
 
-    async def check_old_sessions(self, user_id: int, max_sessions: int) -> bool:
+    async def trim_sessions(self, user_id: int, keep: int) -> int:
         """
-        Проверяет наличие старых сессий пользователя сверх указанного в числа. Удаляет самые старые сессии сверх указанного числа.
-        :param max_sessions:
+        Оставляет keep самых новых сессий пользователя, остальные удаляет одним запросом
         :param user_id:
-        :return:
+        :param keep:
+        :return: число удаленных сессий
         """
-        over_max_sessions = False
-        all_sessions = await self.find(filter_dict={"user_id": user_id})
-        if all_sessions is not None and len(all_sessions) > max_sessions - 1:
-            over_max_sessions = True
-            all_sessions.sort(key=lambda s: s.created_at)
-            for old_session in all_sessions[: -max_sessions + 1]:
-                await self._session.delete(old_session)
-            await self._session.commit()
-
-        return over_max_sessions
+        newest = (
+            select(self.model.id)
+            .where(self.model.user_id == user_id)
+            .order_by(self.model.created_at.desc(), self.model.id.desc())
+            .limit(max(keep, 0))
+        )
+        stmt = (
+            delete(self.model)
+            .where(self.model.user_id == user_id, self.model.id.not_in(newest))
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.rowcount
 
     async def create_session(self, data: TokenSession, max_sessions: int):
         """
@@ -64,7 +112,5 @@ class RefreshSessionDAO(BaseDAO):
         :param max_sessions:
         :return:
         """
-        await self.check_old_sessions(data.user_id, max_sessions)
-
+        await self.trim_sessions(data.user_id, max_sessions - 1)
         await super().create(data=data)
-        await self._session.commit()
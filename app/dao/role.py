@@ -0,0 +1,30 @@
+from typing import Optional, Sequence
+
+from pydantic import BaseModel
+
+from app.dao.base import BaseDAO
+from app.models.role import Role
+from app.services.user_cache import invalidate_role
+
+
+class RoleDAO(BaseDAO):
+    model = Role
+
+    async def update(self, filters: BaseModel, data: BaseModel) -> list[Role]:
+        """
+        Обновляет роли и сбрасывает снимки пользователей с этими ролями
+        """
+        updated_roles = await super().update(filters, data)
+        for role in updated_roles:
+            invalidate_role(role.id)
+        return updated_roles
+
+    async def upsert(
+        self,
+        data: BaseModel,
+        conflict_columns: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+    ) -> Role:
+        role = await super().upsert(data, conflict_columns, update_fields)
+        invalidate_role(role.id)
+        return role
@@ -0,0 +1,201 @@
+from typing import Optional
+
+from sqlalchemy import ColumnElement, CompoundSelect, Select, desc, or_, select, union
+
+from app.core.config import settings
+from app.core.session import USE_REPLICA
+from app.dao.base import BaseDAO
+from app.dao.pagination import Page
+from app.models.project import Project
+from app.models.project_members import ProjectMembers
+from app.models.task import Task
+from app.models.task_responsibles import TaskResponsibles
+from app.schemas.task import TaskFilter
+
+
+class TaskDAO(BaseDAO):
+    model = Task
+
+    @staticmethod
+    def visible_projects(user_id: int) -> Select:
+        """
+        id проектов, задачи которых видны пользователю: открытые проекты,
+        проекты, где он участник или создатель
+        :param user_id:
+        :return:
+        """
+        member_projects = select(ProjectMembers.project_id).where(
+            ProjectMembers.user_id == user_id
+        )
+        return select(Project.id).where(
+            or_(
+                Project.private.is_(False),
+                Project.creator_id == user_id,
+                Project.id.in_(member_projects),
+            )
+        )
+
+    @classmethod
+    def own_tasks(cls, user_id: int) -> list[ColumnElement[bool]]:
+        """
+        Условия видимости, не зависящие от проекта: задача без проекта,
+        созданная пользователем или назначенная ему
+        :param user_id:
+        :return:
+        """
+        assigned_tasks = select(TaskResponsibles.task_id).where(
+            TaskResponsibles.user_id == user_id
+        )
+        return [
+            cls.model.project_id.is_(None),
+            cls.model.creator_id == user_id,
+            cls.model.id.in_(assigned_tasks),
+        ]
+
+    @classmethod
+    def visible_to(cls, user_id: int) -> ColumnElement[bool]:
+        """
+        Условие видимости задачи пользователю: задача в видимом проекте
+        (см. visible_projects) или одна из own_tasks
+        :param user_id:
+        :return:
+        """
+        return or_(
+            cls.model.project_id.in_(cls.visible_projects(user_id)),
+            *cls.own_tasks(user_id),
+        )
+
+    @classmethod
+    def conditions(cls, filters: TaskFilter) -> tuple[dict, list[ColumnElement[bool]]]:
+        """
+        Условия фильтра списка задач: равенства для filter_dict и остальные
+        условия (ответственный, диапазон сроков) для where. Видимость задач
+        пользователю сюда не входит, ее добавляет find_tasks_page
+        :param filters:
+        :return: (filter_dict, where)
+        """
+        filter_dict = filters.model_dump(
+            include={"project_id", "status", "creator_id"}, exclude_none=True
+        )
+        where = []
+        if filters.assignee_id is not None:
+            where.append(
+                cls.model.id.in_(
+                    select(TaskResponsibles.task_id).where(
+                        TaskResponsibles.user_id == filters.assignee_id
+                    )
+                )
+            )
+        if filters.deadline_from is not None:
+            where.append(cls.model.deadline >= filters.deadline_from)
+        if filters.deadline_to is not None:
+            where.append(cls.model.deadline <= filters.deadline_to)
+        return filter_dict, where
+
+    @staticmethod
+    def order_for(filters: TaskFilter) -> tuple[str, ...]:
+        """
+        Колонки сортировки перед id. С фильтром по сроку - срок: диапазон и keyset
+        тогда читаются одним проходом по индексу (deadline, id). Диапазон
+        отсекает задачи без срока, поэтому NULL в колонке сортировки не попадает
+        :param filters:
+        :return:
+        """
+        if filters.deadline_from is not None or filters.deadline_to is not None:
+            return ("deadline",)
+        return ()
+
+    async def find_tasks_page(
+        self,
+        filters: TaskFilter,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Page[Task]:
+        """
+        Страница задач по фильтру, новые первыми (keyset по id), а с фильтром
+        по сроку - с самым поздним сроком первыми (keyset по (deadline, id)).
+        Возвращаются только задачи, видимые пользователю (см. visible_to).
+
+        Видимость проверяется одним из двух способов. Если пользователю видно
+        много проектов, скрытых задач мало, и фильтр visible_to поверх индекса
+        сортировки почти ничего не отсеивает. Если видимых проектов не больше
+        task_list.task_list_branch_projects, страница собирается из
+        keyset-выборок по каждому проекту (_visible_page_ids): фильтр по всей
+        таблице читал бы все строки между редкими видимыми задачами.
+
+        Стоимость страницы не зависит от ее глубины, когда фильтр совпадает
+        с одним из индексов Task.__table_args__: project_id, project_id + status,
+        creator_id, status, диапазон сроков, в том числе вместе с project_id или
+        creator_id. В остальных сочетаниях (ответственный вместе с другими
+        фильтрами, project_id + creator_id, срок вместе со status) база идет
+        по индексу одного фильтра и отсеивает остальные строки, и задержка
+        зависит от их доли.
+        :param filters:
+        :param user_id: пользователь, для которого строится список
+        :param cursor: next_cursor предыдущей страницы
+        :param limit:
+        :return:
+        """
+        filter_dict, where = self.conditions(filters)
+        order_by = self.order_for(filters)
+
+        max_branches = settings.task_list.task_list_branch_projects
+        result = await self._session.execute(
+            self.visible_projects(user_id)
+            .limit(max_branches + 1)
+            .execution_options(**{USE_REPLICA: True})
+        )
+        project_ids = result.scalars().all()
+        if len(project_ids) > max_branches:
+            where.append(self.visible_to(user_id))
+        else:
+            page_ids = self._visible_page_ids(
+                user_id, project_ids, filter_dict, where, order_by, cursor, limit
+            )
+            where.append(self.model.id.in_(page_ids))
+
+        return await self.find_page(
+            order_by=order_by,
+            cursor=cursor,
+            limit=limit,
+            filter_dict=filter_dict,
+            where=where,
+            order_desc=True,
+        )
+
+    def _visible_page_ids(
+        self,
+        user_id: int,
+        project_ids: list[int],
+        filter_dict: dict,
+        where: list[ColumnElement[bool]],
+        order_by: tuple[str, ...],
+        cursor: Optional[str],
+        limit: int,
+    ) -> CompoundSelect:
+        """
+        Кандидаты в страницу для пользователя с небольшим числом видимых проектов:
+        по ветке на каждый проект и на каждое из own_tasks. Ветка - keyset-выборка
+        limit + 1 id по своему индексу, поэтому на страницу читается не больше
+        (число веток x limit) строк, где бы в таблице ни лежали видимые задачи
+        :return: UNION id; окончательные порядок и limit задает find_page
+        """
+        columns = self._keyset_columns(order_by)
+        after = [self._keyset_after(columns, cursor, True)] if cursor else []
+        branches = [self.model.project_id == project_id for project_id in project_ids]
+        branches += self.own_tasks(user_id)
+        return union(
+            *(
+                select(
+                    select(self.model.id)
+                    .filter_by(**filter_dict)
+                    .where(*where, *after, branch)
+                    .order_by(*(desc(c) for c in columns))
+                    .limit(limit + 1)
+                    .subquery()
+                    .c.id
+                )
+                for branch in branches
+            )
+        )
@@ -1,21 +1,58 @@
+from typing import Optional, Sequence
+
 from loguru import logger
-from pydantic import EmailStr
-from sqlalchemy import select, or_
+from pydantic import EmailStr, BaseModel
+from sqlalchemy import Float, and_, func, literal, or_, select, type_coerce, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import undefer
 
+from app.core.session import USE_REPLICA
 from app.dao.base import BaseDAO
-from app.models.user import User
+from app.dao.log import dao_logger
+from app.dao.pagination import Page, decode_cursor, encode_cursor
+from app.models.user import User, user_search_document
 from app.schemas.user import EmailModel, UserLogin, UserCreate
-from app.core.exceptions import IncorrectEmailOrPasswordException
-from app.services.crypto import CryptoService
+from app.core.exceptions import (
+    IncorrectEmailOrPasswordException,
+    UserAlreadyExistsException,
+)
+from app.services.password_hasher import password_hasher
+from app.services.user_cache import invalidate_user
 
 
 class UserDAO(BaseDAO):
     model = User
+    # верхняя граница размера страницы поиска
+    SEARCH_MAX_LIMIT = 100
 
-    async def create(self, data: UserCreate):
-        await super().create(data=data)
+    async def create(self, data: UserCreate) -> User:
+        """
+        Создает пользователя одним запросом, полагаясь на уникальность email
+        """
+        user = await self.insert_or_ignore(data, conflict_columns=["email"])
+        if user is None:
+            raise UserAlreadyExistsException
         await self._session.commit()
+        return user
+
+    async def update(self, filters: BaseModel, data: BaseModel) -> list[User]:
+        """
+        Обновляет пользователей и сбрасывает их снимки в кэше
+        """
+        updated_users = await super().update(filters, data)
+        for user in updated_users:
+            invalidate_user(user.id)
+        return updated_users
+
+    async def upsert(
+        self,
+        data: BaseModel,
+        conflict_columns: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+    ) -> User:
+        user = await super().upsert(data, conflict_columns, update_fields)
+        invalidate_user(user.id)
+        return user
 
     async def get_user_by_credentials(self, email: EmailStr, password: str) -> User:
         """
@@ -24,33 +61,95 @@ class UserDAO(BaseDAO):
         :param email:
         :return:
         """
-        user = await self.find_one_or_none(filter=EmailModel(email=email))
+        # с основной БД: на реплике может еще не быть только что
+        # зарегистрированного пользователя или сменившегося пароля
+        user = await self.find_one_or_none(
+            filter=EmailModel(email=email),
+            options=[undefer(User.password)],
+            use_replica=False,
+        )
         if not (
             user
-            and CryptoService.validate_hashed(
-                compared_str=password, hashed_str=user.password
-            )
+            and await password_hasher.verify(password=password, hashed=user.password)
         ):
             raise IncorrectEmailOrPasswordException
         return user
 
-    async def search_by_name_or_email(self, query: str) -> list[User]:
+    async def update_password_hash(
+        self, user_id: int, old_hash: bytes, new_hash: bytes
+    ) -> bool:
+        """
+        Заменяет хеш пароля, только если он не менялся с момента чтения
+        (пароль могли сменить параллельно). Не коммитит.
+        :param user_id:
+        :param old_hash:
+        :param new_hash:
+        :return: True, если хеш обновлен
+        """
+        stmt = (
+            update(self.model)
+            .where(self.model.id == user_id, self.model.password == old_hash)
+            .values(password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._session.execute(stmt)
+        return result.rowcount > 0
+
+    async def search_by_name_or_email(
+        self, query: str, limit: int = 20, cursor: Optional[str] = None
+    ) -> Page[User]:
         """
         Ищет пользователей по части имени, фамилии или email (без учета регистра).
+        На Postgres поиск идет по GIN-индексу pg_trgm ix_users_search_trgm:
+        подстрока или похожее слово (оператор <%), результаты ранжируются
+        по word_similarity. На других СУБД - только поиск подстроки без ранжирования.
+        Не более SEARCH_MAX_LIMIT записей на страницу, следующие страницы - по курсору.
+        :param query:
+        :param limit:
+        :param cursor: next_cursor предыдущей страницы
+        :return:
         """
-        logger.debug(f"Поиск пользователей по запросу: '{query}'")
+        query = query.strip().lower()
+        limit = max(1, min(limit, self.SEARCH_MAX_LIMIT))
+        dao_logger.debug(
+            "Поиск пользователей по запросу: '{query}', limit: {limit}",
+            query=lambda: query,
+            limit=lambda: limit,
+        )
         try:
-            stmt = select(self.model).where(
-                or_(
-                    self.model.first_name.ilike(f"%{query}%"),
-                    self.model.last_name.ilike(f"%{query}%"),
-                    self.model.email.ilike(f"%{query}%"),
-                )
+            matches = user_search_document.contains(query, autoescape=True)
+            if self._session.get_bind().dialect.name == "postgresql":
+                matches = or_(matches, literal(query).op("<%")(user_search_document))
+                score = func.word_similarity(query, user_search_document)
+            else:
+                score = literal(1.0, Float)
+            score = type_coerce(score, Float).label("score")
+            columns = [score, self.model.id]
+
+            stmt = (
+                select(self.model, score)
+                .where(matches)
+                .execution_options(**{USE_REPLICA: True})
             )
-            result = await self._session.execute(stmt)
-            records = list(result.scalars().all())
-            logger.debug(f"Найдено {len(records)} пользователей")
-            return records
+            if cursor:
+                last_score, last_id = decode_cursor(columns, cursor)
+                stmt = stmt.where(
+                    or_(
+                        score.element < last_score,
+                        and_(score.element == last_score, self.model.id > last_id),
+                    )
+                )
+            stmt = stmt.order_by(score.desc(), self.model.id).limit(limit + 1)
+            rows = (await self._session.execute(stmt)).all()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last_user, last_score = rows[-1]
+                next_cursor = encode_cursor(columns, [last_score, last_user.id])
+            records = [user for user, _ in rows]
+            dao_logger.debug("Найдено {count} пользователей", count=records.__len__)
+            return Page(items=records, next_cursor=next_cursor)
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при поиске пользователей: {e}")
             raise
@@ -1,33 +1,30 @@
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.core.config import settings
-from app.core.exceptions import InvalidTokenException, UserNotFoundException
-from app.dao.user import UserDAO
+from app.core.exceptions import (
+    ForbiddenException,
+    InvalidTokenException,
+    UserNotFoundException,
+)
 from app.dependencies.auth import http_bearer
 from app.dependencies.dao import get_session_without_commit
-from app.models import User
-from app.services.crypto import CryptoService
+from app.schemas.token import TokenClaims
+from app.schemas.user import UserInfo
+from app.services.auth import crypto_service, get_user_snapshot
 
 
-async def get_current_user(
+async def get_token_claims(
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
-    session: AsyncSession = Depends(get_session_without_commit),
-):
+) -> TokenClaims:
     """
-    Возвращает текущего авторизованного пользователя
-    :param session:
+    Возвращает данные из access токена без обращения к БД.
+    Роль заполнена, только если включен auth_jwt.embed_role_claims.
     :param credentials:
     :return:
     """
-    crypto_service = CryptoService(
-        public_key=settings.auth_jwt.public_key,
-        private_key=settings.auth_jwt.private_key,
-        algorithm=settings.auth_jwt.algorithm,
-    )
-    payload = crypto_service.get_payload(credentials.credentials)
+    payload = crypto_service.get_payload(credentials.credentials, use_cache=True)
     user_id_str = payload.get("sub")
     if not user_id_str:
         raise InvalidTokenException
@@ -35,11 +32,39 @@ async def get_current_user(
         user_id = int(user_id_str)
     except ValueError:
         raise InvalidTokenException
-    user_dao = UserDAO(session)
-    user = await user_dao.find_one_or_none(
-        filter_dict={"id": user_id}, options=[selectinload(User.role)]
+    return TokenClaims(
+        user_id=user_id,
+        role_id=payload.get("role_id"),
+        role_code=payload.get("role"),
     )
+
+
+async def get_current_user(
+    claims: TokenClaims = Depends(get_token_claims),
+    session: AsyncSession = Depends(get_session_without_commit),
+) -> UserInfo:
+    """
+    Возвращает снимок текущего авторизованного пользователя.
+    Снимок берется из кэша, к БД обращается только при промахе.
+    :param session:
+    :param claims:
+    :return:
+    """
+    user = await get_user_snapshot(claims.user_id, session)
     if not user:
         raise UserNotFoundException
 
     return user
+
+
+async def get_metrics_viewer(
+    user: UserInfo = Depends(get_current_user),
+) -> UserInfo:
+    """
+    Текущий пользователь, если его роль есть в instrumentation.metrics_role_codes
+    :param user:
+    :return:
+    """
+    if user.role.code not in settings.instrumentation.metrics_role_codes:
+        raise ForbiddenException
+    return user
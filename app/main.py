@@ -1,18 +1,51 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 import uvicorn
 from fastapi import FastAPI
+from loguru import logger
 
 from app.core.config import settings
+from app.core.instrumentation import SQLInstrumentationMiddleware
 from app.core.logger import setup_logger
-from app.routers import auth, users
+from app.core.session import engine
+from app.routers import auth, metrics, tasks, users
+from app.services.auth import crypto_service
+from app.services.key_ring import key_ring
+from app.services.password_hasher import password_hasher
+from app.services.session_sweeper import run_session_sweeper
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     settings.LOGS_DIR.mkdir(exist_ok=True)
+    key_ring.load()
+    hashing = settings.password_hashing
+    if hashing.hash_rounds is None:
+        password_hasher.calibrate(
+            hashing.hash_target_ms, hashing.hash_min_rounds, hashing.hash_max_rounds
+        )
+    password_hasher.start()
+
+    sweeper_task = None
+    if settings.session_sweeper.sweeper_enabled:
+        sweeper_task = asyncio.create_task(
+            run_session_sweeper(
+                engine,
+                interval=settings.session_sweeper.sweeper_interval_seconds,
+                batch_size=settings.session_sweeper.sweeper_batch_size,
+            )
+        )
+
     yield
 
+    if sweeper_task:
+        sweeper_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await sweeper_task
+    password_hasher.shutdown()
+    logger.info(f"Кэш проверенных токенов: {crypto_service.token_cache.stats()}")
+
 
 app = FastAPI(
     title="TaskFlow-API",
@@ -22,13 +55,21 @@ app = FastAPI(
 
 setup_logger()
 
+if settings.instrumentation.sql_instrumentation_enabled:
+    app.add_middleware(
+        SQLInstrumentationMiddleware,
+        n_plus_one_threshold=settings.instrumentation.n_plus_one_threshold,
+    )
+
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy"}
 
 
-routers = [auth, users]
+routers = [auth, users, tasks]
+if settings.instrumentation.sql_instrumentation_enabled:
+    routers.append(metrics)
 for router in routers:
     app.include_router(router.router, prefix=settings.api_config.prefix)
 
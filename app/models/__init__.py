@@ -4,6 +4,7 @@ from app.models.base import Base
 from app.models.comment import Comment
 from app.models.project import Project
 from app.models.project_members import ProjectMembers
+from app.models.refresh_session import RefreshSession
 from app.models.role import Role
 from app.models.task import Task
 from app.models.task_responsibles import TaskResponsibles
@@ -18,4 +19,5 @@ __all__ = (
     "Task",
     "TaskResponsibles",
     "Comment",
+    "RefreshSession",
 )
@@ -10,10 +10,12 @@ from app.models.mixins.int_id_pk import IntIdPk
 class RefreshSession(IntIdPk, CreatedUpdated, Base):
     __tablename__ = "refresh_session"
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
-    refresh_token: Mapped[str] = mapped_column(String, nullable=False)
+    refresh_token_hash: Mapped[str] = mapped_column(
+        String(64), nullable=False, unique=True, index=True
+    )
     user_agent: Mapped[str] = mapped_column(String(200), nullable=False)
     fingerprint: Mapped[str] = mapped_column(String, nullable=False)
     ip: Mapped[str] = mapped_column(String(15), nullable=False)
-    expires_in: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    expires_in: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
 
     user: Mapped["User"] = relationship(back_populates="refresh_sessions")
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from sqlalchemy import ForeignKey, DateTime, String, text
+from sqlalchemy import ForeignKey, DateTime, Index, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.orm import relationship
 
@@ -14,6 +14,34 @@ from app.models.user import User
 
 
 class Task(IntIdPk, CreatedUpdated, Base):
+    # индексы под фильтры GET /api/tasks (см. TaskDAO.find_tasks_page): колонки
+    # сортировки в конце дают keyset-страницу проходом по индексу без сортировки.
+    # Сочетания фильтров, для которых индекса нет, отсеивают строки после него.
+    # Индексы по проекту, автору и задачам без проекта (с id и с (deadline, id))
+    # нужны и веткам видимости TaskDAO._visible_page_ids. IS NULL не дает
+    # упорядоченного прохода по (project_id, id), поэтому для задач без проекта
+    # индексы частичные
+    __table_args__ = (
+        Index("ix_tasks_project_id_id", "project_id", "id"),
+        Index("ix_tasks_project_id_status_id", "project_id", "status", "id"),
+        Index("ix_tasks_project_id_deadline_id", "project_id", "deadline", "id"),
+        Index("ix_tasks_creator_id_id", "creator_id", "id"),
+        Index("ix_tasks_creator_id_deadline_id", "creator_id", "deadline", "id"),
+        Index("ix_tasks_status_id", "status", "id"),
+        Index("ix_tasks_deadline_id", "deadline", "id"),
+        Index(
+            "ix_tasks_no_project_id",
+            "id",
+            postgresql_where=text("project_id IS NULL"),
+        ),
+        Index(
+            "ix_tasks_no_project_deadline_id",
+            "deadline",
+            "id",
+            postgresql_where=text("project_id IS NULL"),
+        ),
+    )
+
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(String(500))
     creator_id: Mapped[int] = mapped_column(
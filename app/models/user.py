@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, text, String
+from sqlalchemy import DDL, ForeignKey, Index, String, event, func, literal_column, text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.orm import relationship
 
@@ -11,7 +11,8 @@ class User(IntIdPk, CreatedUpdated, Base):
     first_name: Mapped[str] = mapped_column(String(100), nullable=False)
     last_name: Mapped[str] = mapped_column(String(100), nullable=False)
     email: Mapped[str_uniq]
-    password: Mapped[bytes]
+    # хеш нужен только при входе: загружается явно через undefer(User.password)
+    password: Mapped[bytes] = mapped_column(deferred=True, deferred_raiseload=True)
     role_id: Mapped[int] = mapped_column(
         ForeignKey("roles.id"), default=2, server_default=text("2")
     )
@@ -34,3 +35,26 @@ class User(IntIdPk, CreatedUpdated, Base):
         back_populates="user",
         cascade="all, delete-orphan",
     )
+
+
+# нормализованная строка для поиска по имени и email; выражение должно
+# совпадать с индексом ix_users_search_trgm, иначе Postgres его не использует
+_space = literal_column("' '")
+user_search_document = func.lower(
+    User.first_name + _space + User.last_name + _space + User.email
+)
+
+Index(
+    "ix_users_search_trgm",
+    user_search_document.label("search_document"),
+    postgresql_using="gin",
+    postgresql_ops={"search_document": "gin_trgm_ops"},
+)
+
+# операторный класс индекса из расширения pg_trgm; в миграциях оно создается
+# явно, а это событие нужно для create_all (тесты, бенчмарки)
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Response, Body
+from fastapi import APIRouter, Response, Body, BackgroundTasks
 from fastapi.params import Depends
 from sqlalchemy import false
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -19,6 +19,7 @@ from app.schemas.user import (
 )
 from app.services import auth
 from app.services.auth import register_new_user, update_tokens
+from app.services.login_throttle import login_throttle
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -35,19 +36,25 @@ async def register(
 async def jwt_login(
     response: Response,
     data: UserCredentials,
+    background_tasks: BackgroundTasks,
     context: ContextData = Depends(get_auth_context),
     session: AsyncSession = Depends(get_session_without_commit),
 ):
     """
-    Устанавливает refresh токен в куку, access token в тело ответа
+    Устанавливает refresh токен в куку, access token в тело ответа.
+    Попытки входа ограничиваются до проверки пароля.
     :param response:
     :param data:
+    :param background_tasks:
     :param context:
     :param session:
     :return:
     """
+    await login_throttle.check(
+        email=data.email, client_host=context.client_host, fingerprint=data.fingerprint
+    )
     user = await auth.get_auth_user(
-        UserLogin(email=data.email, password=data.password), session
+        UserLogin(email=data.email, password=data.password), session, background_tasks
     )
 
     tokens_pair = await update_tokens(
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+
+from app.core.instrumentation import metrics_snapshot
+from app.dependencies.user import get_metrics_viewer
+
+router = APIRouter(
+    prefix="/metrics", tags=["metrics"], dependencies=[Depends(get_metrics_viewer)]
+)
+
+
+@router.get("")
+async def get_metrics():
+    """
+    Накопленная статистика SQL по эндпоинтам с момента запуска воркера.
+    Доступна ролям из instrumentation.metrics_role_codes
+    """
+    return metrics_snapshot()
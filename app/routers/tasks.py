@@ -0,0 +1,37 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dao.task import TaskDAO
+from app.dependencies.dao import get_session_without_commit
+from app.dependencies.user import get_current_user
+from app.schemas.pagination import CursorPage
+from app.schemas.task import TaskFilter, TaskRead
+from app.schemas.user import UserInfo
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+
+@router.get("", response_model=CursorPage[TaskRead])
+async def list_tasks(
+    filters: TaskFilter = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    user: UserInfo = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session_without_commit),
+):
+    """
+    Список задач, новые первыми; с фильтром по сроку - по убыванию срока
+    (задачи без срока в него не попадают). Следующая страница запрашивается
+    с cursor из next_cursor предыдущего ответа.
+    Задачи закрытых проектов видны только их участникам, создателю проекта,
+    а также автору и ответственным задачи.
+    """
+    page = await TaskDAO(session).find_tasks_page(
+        filters, user_id=user.id, cursor=cursor, limit=limit
+    )
+    return CursorPage[TaskRead](
+        items=[TaskRead.model_validate(task) for task in page.items],
+        next_cursor=page.next_cursor,
+    )
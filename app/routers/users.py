@@ -1,12 +1,11 @@
 from fastapi import APIRouter, Depends
 
 from app.dependencies.user import get_current_user
-from app.models import User
 from app.schemas.user import UserInfo
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me/", response_model=UserInfo)
-async def get_me(user: User = Depends(get_current_user)):
-    return UserInfo.model_validate(user)
+async def get_me(user: UserInfo = Depends(get_current_user)):
+    return user
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 
 
 class CommentBase(BaseModel):
@@ -15,7 +15,8 @@ class CommentUpdate(CommentBase):
 
 class CommentRead(CommentBase):
     id: int
-    author_id: int
+    # в модели Comment автор хранится в колонке user_id
+    author_id: int = Field(validation_alias=AliasChoices("author_id", "user_id"))
     task_id: int
 
     class Config:
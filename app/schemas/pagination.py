@@ -0,0 +1,19 @@
+from typing import Generic, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+
+class CountResult(BaseModel):
+    value: int = Field(description="Число записей")
+    exact: bool = Field(
+        description="False, если число оценено планировщиком и показывается как ~N"
+    )
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = Field(
+        None, description="Курсор следующей страницы, null - страница последняя"
+    )
@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from app.models.enums.task_status import Status
 
@@ -28,3 +28,23 @@ class TaskRead(TaskBase):
 
     class Config:
         from_attributes = True
+
+
+class TaskFilter(BaseModel):
+    project_id: Optional[int] = None
+    status: Optional[Status] = None
+    creator_id: Optional[int] = None
+    assignee_id: Optional[int] = Field(None, description="Ответственный за задачу")
+    deadline_from: Optional[datetime] = None
+    deadline_to: Optional[datetime] = None
+
+    @field_validator("deadline_from", "deadline_to")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """
+        Task.deadline хранится без часового пояса (в UTC): время с поясом
+        приводится к UTC, иначе asyncpg не примет его для колонки timestamp
+        """
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
@@ -10,7 +10,7 @@ class LoginResponse(BaseModel):
 
 class TokenSession(BaseModel):
     user_id: int
-    refresh_token: str
+    refresh_token_hash: str
     user_agent: str
     fingerprint: str
     ip: str
@@ -28,3 +28,9 @@ class TokensPair(BaseModel):
 class ContextData(BaseModel):
     user_agent: str
     client_host: str
+
+
+class TokenClaims(BaseModel):
+    user_id: int
+    role_id: int | None = None
+    role_code: str | None = None
@@ -1,62 +1,120 @@
+from typing import Optional
+
+from fastapi import BackgroundTasks
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.exceptions import (
-    UserAlreadyExistsException,
     RefreshSessionNotFoundException,
     InvalidFingerprintException,
 )
+from app.core.session import async_session_maker
 from app.dao.refresh_session import RefreshSessionDAO
 from app.dao.user import UserDAO
-from app.models.refresh_session import RefreshSession
 from app.schemas.token import TokensPair, TokenSession
 from app.schemas.user import (
     UserRegister,
-    EmailModel,
     UserCreate,
     UserLogin,
+    UserInfo,
 )
 from app.services.crypto import CryptoService
+from app.services.key_ring import key_ring
+from app.services.password_hasher import password_hasher
+from app.services.user_cache import user_cache
 
 crypto_service = CryptoService(
-    settings.auth_jwt.public_key,
-    settings.auth_jwt.private_key,
-    settings.auth_jwt.algorithm,
+    key_ring, token_cache_size=settings.auth_jwt.verified_token_cache_size
 )
 
 
 async def register_new_user(user_data: UserRegister, session: AsyncSession):
     """
-    Регистрация нового пользователя
+    Регистрация нового пользователя.
+    Занятый email определяется по конфликту уникального ключа при вставке.
     :param session:
     :param user_data:
     :return:
     """
-    dao = UserDAO(session)
-    probably_existing_user = await dao.find_one_or_none(
-        filter=EmailModel(email=user_data.email)
-    )
-    if probably_existing_user:
-        raise UserAlreadyExistsException
-
     user_data_dict = user_data.model_dump()
-    user_data_dict["password"] = CryptoService.hash_password(user_data_dict["password"])
+    user_data_dict["password"] = await password_hasher.hash(user_data_dict["password"])
 
-    await dao.create(data=UserCreate(**user_data_dict))
+    await UserDAO(session).create(data=UserCreate(**user_data_dict))
 
 
-async def get_auth_user(login_data: UserLogin, session: AsyncSession):
+async def get_auth_user(
+    login_data: UserLogin,
+    session: AsyncSession,
+    background_tasks: Optional[BackgroundTasks] = None,
+):
     """
-    Возвращает пользователя по логину и паролю
+    Возвращает пользователя по логину и паролю.
+    Если хеш пароля создан с другой стоимостью bcrypt, пересчитывает его
+    фоновой задачей после отправки ответа.
     :param login_data:
     :param session:
+    :param background_tasks:
     :return:
     """
     user_dao = UserDAO(session)
-    return await user_dao.get_user_by_credentials(
+    user = await user_dao.get_user_by_credentials(
         email=login_data.email, password=login_data.password
     )
+    if background_tasks is not None and password_hasher.needs_rehash(user.password):
+        background_tasks.add_task(
+            rehash_password, user.id, login_data.password, user.password
+        )
+    return user
+
+
+async def rehash_password(user_id: int, password: str, old_hash: bytes) -> None:
+    """
+    Пересчитывает хеш пароля с текущей стоимостью bcrypt в отдельной сессии.
+    Ошибки только логируются: хеш будет пересчитан при следующем входе.
+    :param user_id:
+    :param password:
+    :param old_hash:
+    :return:
+    """
+    try:
+        new_hash = await password_hasher.hash(password)
+        async with async_session_maker() as session:
+            updated = await UserDAO(session).update_password_hash(
+                user_id, old_hash, new_hash
+            )
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Не удалось пересчитать хеш пароля пользователя {user_id}: {e}")
+        return
+    if updated:
+        logger.info(
+            f"Хеш пароля пользователя {user_id} пересчитан: "
+            f"{CryptoService.get_rounds(old_hash)} -> {password_hasher.rounds}"
+        )
+
+
+async def get_user_snapshot(user_id: int, session: AsyncSession) -> Optional[UserInfo]:
+    """
+    Возвращает снимок пользователя с ролью. В БД обращается только при промахе кэша.
+    :param user_id:
+    :param session:
+    :return:
+    """
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    # с основной БД: снимок кэшируется на весь TTL, и устаревшая роль с реплики
+    # (или отсутствие только что созданного пользователя) жила бы в кэше и токенах
+    users = await UserDAO(session).find_as(
+        UserInfo, filter_dict={"id": user_id}, limit=1, use_replica=False
+    )
+    if not users:
+        return None
+    snapshot = users[0]
+    user_cache.set(user_id, snapshot)
+    return snapshot
 
 
 async def update_tokens(
@@ -67,13 +125,21 @@ async def update_tokens(
     session: AsyncSession,
 ) -> TokensPair:
     """
-    Общая функция для обновления токенов refresh и auth. Добавляет refresh сессию в БД.
+    Общая функция для обновления токенов refresh и auth. Добавляет refresh сессию в БД
+    и фиксирует транзакцию вместе со всеми предыдущими изменениями сессий.
     :return:
     """
+    access_claims = None
+    if settings.auth_jwt.embed_role_claims:
+        snapshot = await get_user_snapshot(user_id, session)
+        if snapshot:
+            access_claims = {"role_id": snapshot.role.id, "role": snapshot.role.code}
+
     tokens_pair = crypto_service.create_tokens_pair(
         str(user_id),
         settings.auth_jwt.refresh_token_expire_minutes,
         settings.auth_jwt.access_token_expire_minutes,
+        access_claims=access_claims,
     )
     refresh = tokens_pair.refresh
 
@@ -81,7 +147,7 @@ async def update_tokens(
     await session_dao.create_session(
         TokenSession(
             user_id=user_id,
-            refresh_token=refresh.token,
+            refresh_token_hash=CryptoService.hash_token(refresh.token),
             user_agent=user_agent,
             fingerprint=fingerprint,
             ip=client_host,
@@ -89,6 +155,7 @@ async def update_tokens(
         ),
         settings.auth_jwt.max_sessions,
     )
+    await session.commit()
 
     return tokens_pair
 
@@ -116,11 +183,6 @@ async def update_tokens(
 #     return user
 
 
-async def delete_session(refresh_session: RefreshSession, session: AsyncSession):
-    refresh_session_dao = RefreshSessionDAO(session)
-    await refresh_session_dao.delete_session(refresh_session)
-
-
 async def delete_session_for_token(
     refresh_token: str,
     session: AsyncSession,
@@ -128,24 +190,24 @@ async def delete_session_for_token(
 ):
     refresh_session_dao = RefreshSessionDAO(session)
     if delete_all_sessions:
-        refresh_session = await refresh_session_dao.get_session_by_refresh_token(
-            refresh_token
-        )
-        await refresh_session_dao.delete_all_user_sessions(refresh_session.user_id)
-        return None
-    await refresh_session_dao.delete_last_session_for_token(refresh_token)
+        await refresh_session_dao.delete_all_sessions_for_token(refresh_token)
+    else:
+        await refresh_session_dao.pop_session_by_refresh_token(refresh_token)
+    await session.commit()
     return None
 
 
-async def check_refresh_session(
+async def consume_refresh_session(
     refresh_token: str,
     fingerprint: str,
     session: AsyncSession,
 ) -> int:
     """
-    Проверяет refresh токен и возвращает ID пользователя из сессии.
+    Проверяет refresh токен, удаляет его сессию и возвращает ID пользователя.
     1. Проверяет на время жизни
-    2. Проверяет на соответствие fingerprint
+    2. Удаляет сессию (токен одноразовый)
+    3. Проверяет на соответствие fingerprint
+    Коммит не выполняется, кроме случая неверного fingerprint.
     :param refresh_token:
     :param fingerprint:
     :param session:
@@ -153,7 +215,7 @@ async def check_refresh_session(
     """
     _ = crypto_service.get_payload(refresh_token)
     refresh_session_dao = RefreshSessionDAO(session)
-    refresh_session = await refresh_session_dao.get_session_by_refresh_token(
+    refresh_session = await refresh_session_dao.pop_session_by_refresh_token(
         refresh_token
     )
     if not refresh_session:
@@ -163,7 +225,7 @@ async def check_refresh_session(
         logger.error(
             f"Попытка обновления токена с неверным fingerprint. user_id={refresh_session.user_id}!"
         )
-        await refresh_session_dao.delete_session(refresh_session)
+        await session.commit()
         raise InvalidFingerprintException
 
     return refresh_session.user_id
@@ -177,7 +239,8 @@ async def refresh(
     session: AsyncSession,
 ) -> TokensPair:
     """
-    Осуществляет refresh токенов
+    Осуществляет refresh токенов. Удаление старой сессии, удаление лишних сессий
+    и создание новой выполняются в одной транзакции.
     :param fingerprint:
     :param refresh_token:
     :param user_agent:
@@ -185,7 +248,6 @@ async def refresh(
     :param session:
     :return:
     """
-    user_id = await check_refresh_session(refresh_token, fingerprint, session)
-    await delete_session_for_token(refresh_token=refresh_token, session=session)
+    user_id = await consume_refresh_session(refresh_token, fingerprint, session)
 
     return await update_tokens(user_agent, fingerprint, user_id, client_host, session)
@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    LRU-кэш ограниченного размера с временем жизни записей.
+
+    Операции не содержат await, поэтому внутри одного event loop
+    они не прерываются другими корутинами и не требуют блокировок.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> Optional[V]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: K,
+        value: V,
+        ttl: Optional[float] = None,
+        expires_at: Optional[float] = None,
+    ) -> None:
+        """
+        Сохраняет значение. Срок жизни задается либо через ttl (секунды),
+        либо абсолютным временем expires_at (unix timestamp).
+        :param key:
+        :param value:
+        :param ttl:
+        :param expires_at:
+        :return:
+        """
+        if self._maxsize <= 0:
+            return
+        if expires_at is None:
+            ttl = self._ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else float("inf")
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def remove_if(self, predicate: Callable[[K, V], bool]) -> int:
+        """
+        Удаляет все записи, для которых predicate(key, value) истинен
+        :return: число удаленных записей
+        """
+        keys = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self._maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,60 +1,114 @@
 import datetime
-from pathlib import Path
+import hashlib
+import uuid
+from typing import Optional
 
 import bcrypt
 import jwt
 
 from app.core.exceptions import ExpiredTokenException, InvalidTokenException
 from app.schemas.token import TokensPair, TokenData
+from app.services.cache import TTLCache
+from app.services.key_ring import KeyRing, JWTKey
 
 
 class CryptoService:
-    def __init__(self, public_key: Path, private_key: Path, algorithm: str):
-        self._public_key = public_key
-        self._algorithm = algorithm
-        self._private_key = private_key
+    def __init__(self, key_ring: KeyRing, token_cache_size: int = 0):
+        self._key_ring = key_ring
+        # дайджест токена -> payload уже проверенных токенов, живут до exp токена
+        self._token_cache: TTLCache[bytes, dict] = TTLCache(maxsize=token_cache_size)
+        # после смены ключей ранее проверенные токены проверяются заново
+        key_ring.add_reload_listener(self._token_cache.clear)
 
-    def encode_jwt(self, payload: dict, private_key: str, algorithm: str):
-        encoded = jwt.encode(payload, private_key, algorithm=algorithm)
+    @property
+    def token_cache(self) -> TTLCache[bytes, dict]:
+        return self._token_cache
+
+    def encode_jwt(self, payload: dict, key: JWTKey):
+        encoded = jwt.encode(
+            payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid}
+        )
         return encoded
 
-    def decode_jwt(self, token: str | bytes, public_key: str, algorithm: str):
-        return jwt.decode(token, public_key, algorithms=[algorithm])
+    def decode_jwt(self, token: str | bytes, key: JWTKey):
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+    def get_payload(self, token: str | bytes, use_cache: bool = False) -> dict:
+        """
+        Проверяет подпись и срок жизни токена и возвращает payload.
+        С use_cache повторные проверки одного и того же токена берутся из LRU-кэша
+        (payload общий для всех вызовов, изменять его нельзя).
+        :param token:
+        :param use_cache:
+        :return:
+        """
+        if not use_cache:
+            return self._verify(token)
 
-    def get_payload(self, token: str | bytes) -> dict:
+        # ключи проверяются и при попадании в кэш: если ключ убран из набора,
+        # перезагрузка очистит кэш и токен будет проверен заново
+        self._key_ring.refresh_if_due()
+        digest = hashlib.sha256(
+            token.encode() if isinstance(token, str) else token
+        ).digest()
+        payload = self._token_cache.get(digest)
+        if payload is None:
+            payload = self._verify(token)
+            if "exp" in payload:
+                self._token_cache.set(digest, payload, expires_at=payload["exp"])
+        return payload
+
+    def _verify(self, token: str | bytes) -> dict:
         try:
-            payload = self.decode_jwt(
-                token, self._public_key.read_text(), algorithm=self._algorithm
-            )
-            return payload
+            header = jwt.get_unverified_header(token)
+            kid = header.get("kid")
+            if kid is not None:
+                key = self._key_ring.get_verification_key(kid)
+                if key is None:
+                    raise InvalidTokenException
+                return self.decode_jwt(token, key)
+
+            # токен без kid: пробуем ключи с алгоритмом из заголовка
+            for key in self._key_ring.get_legacy_verification_keys(header.get("alg")):
+                try:
+                    return self.decode_jwt(token, key)
+                except jwt.InvalidSignatureError:
+                    continue
+            raise InvalidTokenException
         except jwt.ExpiredSignatureError:
             raise ExpiredTokenException
         except jwt.InvalidTokenError:
             raise InvalidTokenException
 
     def create_tokens_pair(
-        self, sub: str, refresh_exp_minutes: int, access_exp_minutes
+        self,
+        sub: str,
+        refresh_exp_minutes: int,
+        access_exp_minutes,
+        access_claims: dict | None = None,
     ) -> TokensPair:
         now = datetime.datetime.now(datetime.UTC)
         refresh_exp = now + datetime.timedelta(minutes=refresh_exp_minutes)
         access_exp = now + datetime.timedelta(minutes=access_exp_minutes)
+        key = self._key_ring.signing_key
         token = self.encode_jwt(
             payload={
+                **(access_claims or {}),
                 "sub": sub,
                 "exp": int(access_exp.timestamp()),
                 "iat": int(now.timestamp()),
+                "jti": uuid.uuid4().hex,
             },
-            private_key=self._private_key.read_text(),
-            algorithm=self._algorithm,
+            key=key,
         )
         refresh_token = self.encode_jwt(
             payload={
                 "sub": sub,
                 "exp": int(refresh_exp.timestamp()),
                 "iat": int(now.timestamp()),
+                "jti": uuid.uuid4().hex,
             },
-            private_key=self._private_key.read_text(),
-            algorithm=self._algorithm,
+            key=key,
         )
 
         return TokensPair(
@@ -63,10 +117,24 @@ class CryptoService:
         )
 
     @staticmethod
-    def hash_password(password: str) -> bytes:
-        salt = bcrypt.gensalt()
+    def hash_token(token: str) -> str:
+        """
+        Дайджест токена фиксированной длины (64 символа) для хранения и поиска в БД
+        """
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def hash_password(password: str, rounds: Optional[int] = None) -> bytes:
+        salt = bcrypt.gensalt(rounds) if rounds else bcrypt.gensalt()
         return bcrypt.hashpw(password.encode(), salt)
 
+    @staticmethod
+    def get_rounds(hashed: bytes) -> int:
+        """
+        Стоимость bcrypt из хеша вида $2b$12$...
+        """
+        return int(hashed.split(b"$")[2])
+
     @staticmethod
     def validate_hashed(compared_str: str, hashed_str: bytes) -> bool:
         return bcrypt.checkpw(compared_str.encode(), hashed_str)
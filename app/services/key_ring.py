@@ -0,0 +1,230 @@
+import base64
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    PublicFormat,
+    load_pem_public_key,
+)
+from jwt.algorithms import get_default_algorithms
+from loguru import logger
+
+from app.core.config import AuthJWT, settings
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    """
+    Разобранный ключ для подписи/проверки JWT
+    """
+
+    kid: str
+    algorithm: str
+    public_key: Any
+    private_key: Optional[Any] = None
+
+
+class KeyRing:
+    """
+    Набор ключей JWT, адресуемых по kid из заголовка токена.
+
+    Ключи читаются с диска и разбираются один раз, после чего используются
+    готовые объекты cryptography. Файлы перечитываются только если изменились
+    их mtime или размер, и проверяется это не чаще, чем раз в check_interval секунд.
+
+    Для ротации без простоя новый ключ кладется в private_key/public_key,
+    а публичный ключ предыдущей пары переносится в extra_public_keys:
+    токены, подписанные старым ключом, продолжают проходить проверку до истечения.
+    Алгоритм дополнительных ключей определяется по типу ключа, поэтому так же
+    выполняется и переход на другой алгоритм (например, RS256 -> EdDSA).
+    """
+
+    def __init__(
+        self,
+        private_key: Path,
+        public_key: Path,
+        algorithm: str,
+        extra_public_keys: Iterable[Path] = (),
+        check_interval: float = 5.0,
+    ):
+        self._private_key_path = private_key
+        self._public_key_path = public_key
+        self._extra_public_key_paths = tuple(extra_public_keys)
+        self._algorithm = algorithm
+        self._check_interval = check_interval
+
+        self._keys: dict[str, JWTKey] = {}
+        self._signing_key: Optional[JWTKey] = None
+        self._stamps: dict[Path, tuple[int, int]] = {}
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._reload_listeners: list[Callable[[], None]] = []
+
+    @classmethod
+    def from_settings(cls, config: AuthJWT) -> "KeyRing":
+        return cls(
+            private_key=config.private_key,
+            public_key=config.public_key,
+            algorithm=config.algorithm,
+            extra_public_keys=config.extra_public_keys,
+            check_interval=config.keys_check_interval,
+        )
+
+    @property
+    def signing_key(self) -> JWTKey:
+        """
+        Текущий ключ для подписи новых токенов
+        """
+        self._maybe_refresh()
+        return self._signing_key
+
+    def get_verification_key(self, kid: str) -> Optional[JWTKey]:
+        """
+        Возвращает ключ для проверки подписи по kid
+        :param kid:
+        :return:
+        """
+        self._maybe_refresh()
+        return self._keys.get(kid)
+
+    def get_legacy_verification_keys(self, algorithm: Optional[str]) -> list[JWTKey]:
+        """
+        Ключи-кандидаты для токенов без kid (выпущенных до появления набора ключей):
+        все ключи с алгоритмом из заголовка alg, текущий - первым.
+        После перехода на другой алгоритм такие токены проверяются прежним
+        ключом из extra_public_keys, а не текущим.
+        :param algorithm: alg из заголовка токена
+        :return:
+        """
+        self._maybe_refresh()
+        keys = [self._signing_key, *self._keys.values()]
+        return list(
+            {key.kid: key for key in keys if key.algorithm == algorithm}.values()
+        )
+
+    def refresh_if_due(self) -> None:
+        """
+        Перечитывает ключи, если подошло время очередной проверки файлов
+        """
+        self._maybe_refresh()
+
+    def add_reload_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Регистрирует функцию, вызываемую после каждой перезагрузки ключей
+        """
+        self._reload_listeners.append(listener)
+
+    def load(self) -> None:
+        """
+        Принудительно читает и разбирает все ключи
+        """
+        with self._lock:
+            self._load()
+
+    def refresh(self) -> bool:
+        """
+        Перечитывает ключи, если файлы изменились с прошлой загрузки
+        :return: True, если набор ключей был перезагружен
+        """
+        with self._lock:
+            self._next_check = time.monotonic() + self._check_interval
+            if self._signing_key is not None and self._stamps == self._read_stamps():
+                return False
+            try:
+                self._load()
+            except (OSError, ValueError) as e:
+                if self._signing_key is None:
+                    raise
+                logger.error(f"Не удалось перечитать ключи JWT, используются прежние: {e}")
+                return False
+            return True
+
+    def _maybe_refresh(self) -> None:
+        if self._signing_key is None or time.monotonic() >= self._next_check:
+            self.refresh()
+
+    def _paths(self) -> tuple[Path, ...]:
+        return (
+            self._private_key_path,
+            self._public_key_path,
+            *self._extra_public_key_paths,
+        )
+
+    def _read_stamps(self) -> dict[Path, tuple[int, int]]:
+        stamps = {}
+        for path in self._paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def _load(self) -> None:
+        stamps = self._read_stamps()
+        algorithm = get_default_algorithms()[self._algorithm]
+
+        private_key = algorithm.prepare_key(self._private_key_path.read_bytes())
+        public_key = algorithm.prepare_key(self._public_key_path.read_bytes())
+        signing_key = JWTKey(
+            kid=self._make_kid(public_key),
+            algorithm=self._algorithm,
+            public_key=public_key,
+            private_key=private_key,
+        )
+
+        keys = {signing_key.kid: signing_key}
+        for path in self._extra_public_key_paths:
+            extra_public_key = load_pem_public_key(path.read_bytes())
+            kid = self._make_kid(extra_public_key)
+            keys.setdefault(
+                kid,
+                JWTKey(
+                    kid=kid,
+                    algorithm=self._detect_algorithm(extra_public_key),
+                    public_key=extra_public_key,
+                ),
+            )
+
+        self._keys = keys
+        self._signing_key = signing_key
+        self._stamps = stamps
+        self._next_check = time.monotonic() + self._check_interval
+        logger.info(
+            f"Загружены ключи JWT: активный kid={signing_key.kid}, всего {len(keys)}"
+        )
+        for listener in self._reload_listeners:
+            listener()
+
+    @staticmethod
+    def _detect_algorithm(public_key: Any) -> str:
+        """
+        Алгоритм подписи по типу публичного ключа
+        """
+        if isinstance(public_key, rsa.RSAPublicKey):
+            return "RS256"
+        if isinstance(public_key, ed25519.Ed25519PublicKey):
+            return "EdDSA"
+        if isinstance(public_key, ec.EllipticCurvePublicKey):
+            curves = {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512"}
+            if public_key.curve.name in curves:
+                return curves[public_key.curve.name]
+        raise ValueError(f"Неподдерживаемый тип ключа: {type(public_key).__name__}")
+
+    @staticmethod
+    def _make_kid(public_key: Any) -> str:
+        """
+        kid вычисляется из публичного ключа, поэтому совпадает у всех воркеров
+        """
+        der = public_key.public_bytes(Encoding.DER, PublicFormat.SubjectPublicKeyInfo)
+        digest = hashlib.sha256(der).digest()
+        return base64.urlsafe_b64encode(digest[:12]).decode()
+
+
+key_ring = KeyRing.from_settings(settings.auth_jwt)
@@ -0,0 +1,73 @@
+"""
+Генерация пары ключей для подписи JWT.
+
+    python -m app.services.keygen --algorithm EdDSA --out certs
+"""
+
+import argparse
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from app.core.config import BASE_DIR
+
+SUPPORTED_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
+
+def generate_key_pair(algorithm: str) -> tuple[bytes, bytes]:
+    """
+    Создает пару ключей для алгоритма подписи
+    :param algorithm: RS256, ES256 или EdDSA (Ed25519)
+    :return: (приватный ключ PEM, публичный ключ PEM)
+    """
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Неподдерживаемый алгоритм: {algorithm}")
+
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private_pem, public_pem
+
+
+def write_key_pair(
+    algorithm: str, directory: Path, prefix: str = "jwt", force: bool = False
+) -> tuple[Path, Path]:
+    """
+    Записывает пару ключей в directory/<prefix>-private.pem и <prefix>-public.pem
+    """
+    private_path = directory / f"{prefix}-private.pem"
+    public_path = directory / f"{prefix}-public.pem"
+    if not force and (private_path.exists() or public_path.exists()):
+        raise FileExistsError(f"Ключи уже существуют в {directory}")
+
+    private_pem, public_pem = generate_key_pair(algorithm)
+    directory.mkdir(parents=True, exist_ok=True)
+    private_path.write_bytes(private_pem)
+    private_path.chmod(0o600)
+    public_path.write_bytes(public_pem)
+    return private_path, public_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерация ключей для JWT")
+    parser.add_argument("--algorithm", choices=SUPPORTED_ALGORITHMS, default="EdDSA")
+    parser.add_argument("--out", type=Path, default=BASE_DIR / "certs")
+    parser.add_argument("--prefix", default="jwt")
+    parser.add_argument("--force", action="store_true", help="перезаписать ключи")
+    args = parser.parse_args()
+
+    paths = write_key_pair(args.algorithm, args.out, args.prefix, args.force)
+    print("\n".join(str(path) for path in paths))
@@ -0,0 +1,185 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol, Sequence
+
+from loguru import logger
+
+from app.core.config import LoginThrottleConfig, settings
+from app.core.exceptions import TooManyLoginAttemptsException
+
+# (ключ, пополнение токенов в секунду, емкость корзины)
+BucketLimit = tuple[bytes, float, float]
+
+
+class ThrottleBackend(Protocol):
+    async def consume(self, limits: Sequence[BucketLimit]) -> bool:
+        """
+        Списывает по одному токену из каждой корзины, если во всех есть токены.
+        Если хотя бы одна корзина пуста, ничего не списывает и возвращает False.
+        """
+        ...
+
+    async def reset(self) -> None: ...
+
+
+class InMemoryThrottleBackend:
+    """
+    Корзины токенов в памяти воркера.
+    Для каждого ключа хранится только пара (токены, время обновления);
+    при превышении max_keys вытесняются давно не использованные ключи.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self._max_keys = max_keys
+        self._buckets: OrderedDict[bytes, tuple[float, float]] = OrderedDict()
+
+    async def consume(self, limits: Sequence[BucketLimit]) -> bool:
+        now = time.monotonic()
+        refilled = []
+        for key, rate, burst in limits:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens < 1:
+                return False
+            refilled.append((key, tokens))
+
+        for key, tokens in refilled:
+            self._buckets[key] = (tokens - 1, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+        return True
+
+    async def reset(self) -> None:
+        self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisThrottleBackend:
+    """
+    Общие для всех воркеров корзины в Redis (нужен пакет redis).
+    Проверка и списание выполняются атомарно Lua-скриптом.
+    """
+
+    _SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local refilled = {}
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[i * 2])
+        local burst = tonumber(ARGV[i * 2 + 1])
+        local bucket = redis.call('HMGET', key, 't', 'u')
+        local tokens = tonumber(bucket[1]) or burst
+        local updated = tonumber(bucket[2]) or now
+        tokens = math.min(burst, tokens + (now - updated) * rate)
+        if tokens < 1 then
+            return 0
+        end
+        refilled[i] = tokens
+    end
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[i * 2])
+        local burst = tonumber(ARGV[i * 2 + 1])
+        redis.call('HSET', key, 't', refilled[i] - 1, 'u', now)
+        redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+    end
+    return 1
+    """
+
+    def __init__(self, url: str, prefix: str = "login-throttle:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "Для общего хранилища ограничений установите пакет redis"
+            ) from e
+        self._client = redis.from_url(url)
+        self._prefix = prefix.encode()
+
+    async def consume(self, limits: Sequence[BucketLimit]) -> bool:
+        keys = [self._prefix + key.hex().encode() for key, _, _ in limits]
+        args = [time.time()]
+        for _, rate, burst in limits:
+            args.extend((rate, burst))
+        try:
+            allowed = await self._client.eval(self._SCRIPT, len(keys), *keys, *args)
+        except Exception as e:
+            # при недоступности Redis вход не блокируем
+            logger.error(f"Ошибка проверки ограничения входа в Redis: {e}")
+            return True
+        return bool(allowed)
+
+    async def reset(self) -> None:
+        async for key in self._client.scan_iter(match=self._prefix + b"*"):
+            await self._client.delete(key)
+
+
+class LoginThrottle:
+    """
+    Ограничение частоты попыток входа по email, IP и fingerprint.
+    Проверяется до обращения к БД и bcrypt, поэтому перебор паролей
+    не расходует CPU на хеширование.
+    """
+
+    def __init__(self, backend: ThrottleBackend, config: LoginThrottleConfig):
+        self._backend = backend
+        self._config = config
+
+    @classmethod
+    def from_settings(cls, config: LoginThrottleConfig) -> "LoginThrottle":
+        if config.login_throttle_redis_url:
+            backend = RedisThrottleBackend(config.login_throttle_redis_url)
+        else:
+            backend = InMemoryThrottleBackend(config.login_throttle_max_keys)
+        return cls(backend, config)
+
+    async def check(
+        self, email: str, client_host: str, fingerprint: Optional[str] = None
+    ) -> None:
+        """
+        Списывает попытку входа или выбрасывает TooManyLoginAttemptsException
+        :param email:
+        :param client_host:
+        :param fingerprint:
+        :return:
+        """
+        if not self._config.login_throttle_enabled:
+            return
+        config = self._config
+        limits = [
+            self._limit(
+                b"e",
+                email.lower(),
+                config.login_email_per_minute,
+                config.login_email_burst,
+            ),
+            self._limit(
+                b"i", client_host, config.login_ip_per_minute, config.login_ip_burst
+            ),
+        ]
+        if fingerprint:
+            limits.append(
+                self._limit(
+                    b"f",
+                    fingerprint,
+                    config.login_fingerprint_per_minute,
+                    config.login_fingerprint_burst,
+                )
+            )
+        if not await self._backend.consume(limits):
+            logger.warning(f"Превышен лимит попыток входа: ip={client_host}")
+            raise TooManyLoginAttemptsException
+
+    async def reset(self) -> None:
+        await self._backend.reset()
+
+    @staticmethod
+    def _limit(kind: bytes, value: str, per_minute: float, burst: int) -> BucketLimit:
+        # в памяти хранится 16-байтный дайджест, а не сам email/IP
+        key = kind + hashlib.blake2b(value.encode(), digest_size=15).digest()
+        return key, per_minute / 60, float(burst)
+
+
+login_throttle = LoginThrottle.from_settings(settings.login_throttle)
@@ -0,0 +1,144 @@
+import asyncio
+import math
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from loguru import logger
+
+from app.core.config import PasswordHashingConfig, settings
+from app.core.exceptions import PasswordHasherBusyException
+from app.services.crypto import CryptoService
+
+R = TypeVar("R")
+
+
+class PasswordHasher:
+    """
+    Асинхронная обертка над bcrypt.
+    Хеширование и проверка выполняются в отдельном пуле потоков или процессов,
+    чтобы не блокировать event loop. Число ожидающих операций ограничено:
+    при переполнении запрос сразу отклоняется, а не встает в очередь.
+
+    Новые хеши создаются со стоимостью rounds; ее можно задать явно
+    или подобрать под бюджет времени через calibrate().
+    Хеши с другой стоимостью пересчитываются при входе: при явной стоимости -
+    в обе стороны, при подобранной - только в сторону повышения.
+    """
+
+    DEFAULT_ROUNDS = 12
+
+    def __init__(
+        self,
+        executor: str = "thread",
+        workers: int = 4,
+        max_pending: int = 64,
+        rounds: Optional[int] = None,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Неизвестный тип пула: {executor}")
+        self._executor_type = executor
+        self._workers = workers
+        self._max_pending = max_pending
+        self.rounds = rounds or self.DEFAULT_ROUNDS
+        # стоимость задана явно и одинакова во всех воркерах
+        self.rounds_fixed = rounds is not None
+        self._pending = 0
+        self._executor: Optional[Executor] = None
+
+    @classmethod
+    def from_settings(cls, config: PasswordHashingConfig) -> "PasswordHasher":
+        return cls(
+            executor=config.hash_executor,
+            workers=config.hash_workers,
+            max_pending=config.hash_max_pending,
+            rounds=config.hash_rounds,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        """
+        Создает пул заранее, чтобы первый логин не платил за его запуск
+        """
+        self._get_executor()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def calibrate(
+        self, target_ms: float, min_rounds: int = 10, max_rounds: int = 16
+    ) -> int:
+        """
+        Подбирает максимальную стоимость bcrypt, при которой хеш укладывается в target_ms.
+        Время хеширования удваивается с каждым раундом, поэтому достаточно
+        замерить самую дешевую стоимость и экстраполировать.
+        :param target_ms: бюджет времени на один хеш
+        :param min_rounds:
+        :param max_rounds:
+        :return: выбранная стоимость
+        """
+        elapsed = []
+        for _ in range(3):
+            started = time.perf_counter()
+            CryptoService.hash_password("calibration", min_rounds)
+            elapsed.append((time.perf_counter() - started) * 1000)
+        base_ms = sorted(elapsed)[1]
+
+        extra_rounds = math.floor(math.log2(target_ms / base_ms)) if target_ms > base_ms else 0
+        self.rounds = max(min_rounds, min(max_rounds, min_rounds + extra_rounds))
+        self.rounds_fixed = False
+        logger.info(
+            f"Стоимость bcrypt: {self.rounds} "
+            f"(~{base_ms * 2 ** (self.rounds - min_rounds):.0f} мс, бюджет {target_ms:.0f} мс)"
+        )
+        return self.rounds
+
+    def needs_rehash(self, hashed: bytes) -> bool:
+        """
+        Хеш должен быть пересчитан при следующем входе.
+        Явно заданная стоимость применяется в обе стороны: понижая hash_rounds,
+        можно намеренно ускорить вход. Подобранная calibrate() стоимость у воркеров
+        может различаться, поэтому по ней хеши только повышаются - иначе они
+        пересчитывались бы туда и обратно при входе через разные воркеры
+        """
+        rounds = CryptoService.get_rounds(hashed)
+        if self.rounds_fixed:
+            return rounds != self.rounds
+        return rounds < self.rounds
+
+    async def hash(self, password: str) -> bytes:
+        return await self._run(CryptoService.hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed: bytes) -> bool:
+        return await self._run(CryptoService.validate_hashed, password, hashed)
+
+    async def _run(self, func: Callable[..., R], *args) -> R:
+        if self._pending >= self._max_pending:
+            logger.warning(
+                f"Очередь хеширования паролей переполнена: {self._pending}/{self._max_pending}"
+            )
+            raise PasswordHasherBusyException
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self._workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+
+password_hasher = PasswordHasher.from_settings(settings.password_hashing)
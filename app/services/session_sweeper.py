@@ -0,0 +1,153 @@
+"""
+Удаление просроченных refresh-сессий.
+
+Работает как фоновая задача приложения (см. lifespan в app/main.py)
+или разово из командной строки:
+
+    python -m app.services.session_sweeper --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.session import engine
+from app.models.refresh_session import RefreshSession
+
+# ключ advisory lock в Postgres, чтобы чистку выполнял только один воркер
+SWEEPER_LOCK_KEY = 0x5E55_1015
+
+
+@dataclass
+class SweepResult:
+    deleted: int
+    batches: int
+    elapsed: float
+    # чистку уже выполняет другой воркер
+    skipped: bool = False
+
+
+async def sweep_expired_sessions(
+    engine: AsyncEngine,
+    batch_size: int = 1000,
+    max_batches: Optional[int] = None,
+    now: Optional[int] = None,
+    transaction_lock: Optional[bool] = None,
+) -> SweepResult:
+    """
+    Удаляет сессии с истекшим expires_in пачками по batch_size строк.
+    Каждая пачка - отдельная короткая транзакция, чтобы не держать блокировки.
+    :param engine:
+    :param batch_size:
+    :param max_batches: ограничение числа пачек за один запуск
+    :param now: текущее время (unix timestamp), по умолчанию - time.time()
+    :param transaction_lock: брать advisory lock в каждой транзакции пачки, а не на
+        сессию соединения. По умолчанию - в режиме db_pool_mode=pooler: PgBouncer
+        в режиме transaction отдает серверное соединение другим клиентам между
+        транзакциями, и сессионная блокировка осталась бы на нем
+    :return:
+    """
+    started = time.perf_counter()
+    now = int(time.time()) if now is None else now
+    if transaction_lock is None:
+        transaction_lock = settings.db_engine.db_pool_mode == "pooler"
+    deleted = 0
+    batches = 0
+    skipped = False
+
+    async with engine.connect() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        session_lock = postgres and not transaction_lock
+        if session_lock:
+            locked = await conn.scalar(select(func.pg_try_advisory_lock(SWEEPER_LOCK_KEY)))
+            await conn.commit()
+            if not locked:
+                return SweepResult(0, 0, time.perf_counter() - started, skipped=True)
+
+        try:
+            while max_batches is None or batches < max_batches:
+                if postgres and transaction_lock:
+                    # снимается сам при commit/rollback пачки; между пачками чистку
+                    # может продолжить другой воркер, удаление от этого не ломается
+                    locked = await conn.scalar(
+                        select(func.pg_try_advisory_xact_lock(SWEEPER_LOCK_KEY))
+                    )
+                    if not locked:
+                        await conn.rollback()
+                        skipped = batches == 0
+                        break
+                expired_ids = (
+                    select(RefreshSession.id)
+                    .where(RefreshSession.expires_in < now)
+                    .order_by(RefreshSession.id)
+                    .limit(batch_size)
+                )
+                result = await conn.execute(
+                    delete(RefreshSession).where(RefreshSession.id.in_(expired_ids))
+                )
+                await conn.commit()
+                batches += 1
+                deleted += result.rowcount
+                if result.rowcount < batch_size:
+                    break
+                # отдаем управление другим корутинам между пачками
+                await asyncio.sleep(0)
+        finally:
+            if session_lock:
+                await conn.execute(select(func.pg_advisory_unlock(SWEEPER_LOCK_KEY)))
+                await conn.commit()
+
+    return SweepResult(deleted, batches, time.perf_counter() - started, skipped=skipped)
+
+
+async def run_session_sweeper(engine: AsyncEngine, interval: float, batch_size: int):
+    """
+    Периодически запускает чистку, пока задачу не отменят
+    """
+    while True:
+        try:
+            result = await sweep_expired_sessions(engine, batch_size=batch_size)
+            if result.skipped:
+                logger.debug("Чистка refresh-сессий уже выполняется другим воркером")
+            else:
+                logger.info(
+                    f"Удалено просроченных refresh-сессий: {result.deleted} "
+                    f"за {result.elapsed:.3f} с ({result.batches} пачек)"
+                )
+        except Exception as e:
+            logger.error(f"Ошибка чистки refresh-сессий: {e}")
+        await asyncio.sleep(interval)
+
+
+async def main(batch_size: int, max_batches: Optional[int]) -> None:
+    try:
+        result = await sweep_expired_sessions(
+            engine, batch_size=batch_size, max_batches=max_batches
+        )
+    finally:
+        await engine.dispose()
+
+    if result.skipped:
+        print("Чистка уже выполняется другим процессом")
+    else:
+        print(
+            f"Удалено: {result.deleted}, пачек: {result.batches}, "
+            f"время: {result.elapsed:.3f} с"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Удаление просроченных refresh-сессий")
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.session_sweeper.sweeper_batch_size
+    )
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.max_batches))
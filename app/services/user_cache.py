@@ -0,0 +1,18 @@
+from app.core.config import settings
+from app.schemas.user import UserInfo
+from app.services.cache import TTLCache
+
+# Снимки пользователей вместе с ролью, ключ - id пользователя.
+# Снимки общие для всех запросов воркера, изменять их нельзя.
+user_cache: TTLCache[int, UserInfo] = TTLCache(
+    maxsize=settings.user_cache.user_cache_max_size,
+    ttl=settings.user_cache.user_cache_ttl,
+)
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.pop(user_id)
+
+
+def invalidate_role(role_id: int) -> None:
+    user_cache.remove_if(lambda _, snapshot: snapshot.role.id == role_id)
@@ -0,0 +1,5 @@
+"""
+Бенчмарки производительности. Запускаются из корня проекта как модули:
+
+    python -m benchmarks.jwt_signing
+"""
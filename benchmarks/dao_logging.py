@@ -0,0 +1,77 @@
+"""
+Накладные расходы отладочного логирования DAO на один вызов:
+f-строка с дампом словаря (как было) против ленивого dao_logger,
+при выключенном и включенном уровне DEBUG.
+
+    python -m benchmarks.dao_logging --iterations 200000
+"""
+
+import argparse
+import json
+import time
+
+from loguru import logger
+
+from app.dao.log import dao_logger, redacted
+
+MODEL_NAME = "RefreshSession"
+FILTER = {
+    "user_id": 42,
+    "refresh_token_hash": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+    "fingerprint": "d41d8cd98f00b204e9800998ecf8427e",
+}
+
+
+def model_name() -> str:
+    return MODEL_NAME
+
+
+def eager(filter_dict: dict) -> None:
+    logger.debug(f"Поиск (одной) записи {MODEL_NAME} по фильтру: {filter_dict}")
+
+
+def lazy(filter_dict: dict) -> None:
+    dao_logger.debug(
+        "Поиск (одной) записи {model} по фильтру: {filter}",
+        model=model_name,
+        filter=redacted(filter_dict),
+    )
+
+
+def measure(func, iterations: int) -> float:
+    """
+    Возвращает наносекунды на вызов
+    """
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        func(FILTER)
+    return (time.perf_counter_ns() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк логирования DAO")
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--json", action="store_true", help="вывод в формате JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for level in ("INFO", "DEBUG"):
+        logger.remove()
+        # обработчик без вывода: измеряется формирование записи, а не запись на диск
+        logger.add(lambda _: None, level=level)
+        results[f"debug_{'on' if level == 'DEBUG' else 'off'}"] = {
+            "eager_ns": round(measure(eager, args.iterations)),
+            "lazy_ns": round(measure(lazy, args.iterations)),
+        }
+    logger.remove()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'DEBUG':<12}{'f-string ns':>14}{'lazy ns':>12}")
+    for name, result in results.items():
+        print(f"{name:<12}{result['eager_ns']:>14}{result['lazy_ns']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Запросы в секунду для горячих запросов DAO: построение select() на каждый вызов
+(как раньше) против готовых параметризованных запросов из кэша BaseDAO.
+Оба варианта выполняются через DAO на SQLite в памяти, поэтому разница - это
+стоимость построения запроса и ключа кэша компиляции SQLAlchemy.
+
+    python -m benchmarks.dao_statements --iterations 5000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+
+from app.dao.base import BaseDAO
+from app.dao.user import UserDAO
+from app.models import Role, User
+from app.models.base import Base
+
+EMAIL = "user-1@example.com"
+
+
+def dao_queries():
+    return {
+        "find_one_or_none(email)": lambda session: UserDAO(session).find_one_or_none(
+            filter_dict={"email": EMAIL}
+        ),
+        "find_one_or_none(id)+role": lambda session: UserDAO(session).find_one_or_none(
+            filter_dict={"id": 1}, options=[joinedload(User.role)]
+        ),
+        "find(role_id)": lambda session: UserDAO(session).find(
+            filter_dict={"role_id": 2}, limit=10
+        ),
+        "count(role_id)": lambda session: UserDAO(session).count(
+            filter_dict={"role_id": 2}
+        ),
+    }
+
+
+@contextmanager
+def statement_cache_disabled():
+    """
+    Запрос строится заново на каждый вызов, как до появления кэша
+    """
+
+    def build_every_time(
+        self, kind, filter_dict, order_by_field=None, order_desc=False, paginate=False
+    ):
+        filter_fields = tuple(sorted((f, v is None) for f, v in filter_dict.items()))
+        stmt = self._build_statement(
+            kind, filter_fields, order_by_field, order_desc, paginate
+        )
+        params = {f"f_{f}": v for f, v in filter_dict.items() if v is not None}
+        return stmt, params
+
+    original = BaseDAO._cached_statement
+    BaseDAO._cached_statement = build_every_time
+    try:
+        yield
+    finally:
+        BaseDAO._cached_statement = original
+
+
+def measure_build(iterations: int) -> dict:
+    """
+    Только Python-часть: построение запроса и ключа кэша компиляции, без БД
+    """
+    dao = UserDAO(session=None)
+    results = {}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        select(User).filter_by(email=EMAIL)._generate_cache_key()
+    results["rebuilt"] = iterations / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        stmt, _params = dao._cached_statement("select", {"email": EMAIL})
+        stmt._generate_cache_key()
+    results["cached"] = iterations / (time.perf_counter() - started)
+    return results
+
+
+async def measure_queries(iterations: int) -> dict:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_maker() as session:
+        session.add(Role(id=2, name="Пользователь", code="user"))
+        session.add_all(
+            User(
+                id=i,
+                email=f"user-{i}@example.com",
+                password=b"hash",
+                first_name="Bench",
+                last_name="User",
+            )
+            for i in range(1, 101)
+        )
+        await session.commit()
+
+    results = {}
+    async with session_maker() as session:
+        for variant, context in (
+            ("rebuilt", statement_cache_disabled),
+            ("cached", nullcontext),
+        ):
+            with context():
+                for name, query in dao_queries().items():
+                    await query(session)
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        await query(session)
+                    qps = iterations / (time.perf_counter() - started)
+                    results.setdefault(name, {})[variant] = qps
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк кэша запросов DAO")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="вывод в формате JSON")
+    args = parser.parse_args()
+    # вывод отладочных логов DAO измерял бы логирование, а не построение запросов
+    logger.remove()
+
+    results = {
+        "build_per_sec": measure_build(args.iterations * 10),
+        "queries_per_sec": asyncio.run(measure_queries(args.iterations)),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    build = results["build_per_sec"]
+    print(
+        f"построение запроса: {build['rebuilt']:.0f}/s -> {build['cached']:.0f}/s "
+        f"(x{build['cached'] / build['rebuilt']:.1f})"
+    )
+    print(f"{'query':<28}{'rebuilt q/s':>14}{'cached q/s':>14}{'speedup':>10}")
+    for name, qps in results["queries_per_sec"].items():
+        print(
+            f"{name:<28}{qps['rebuilt']:>14.0f}{qps['cached']:>14.0f}"
+            f"{qps['cached'] / qps['rebuilt']:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
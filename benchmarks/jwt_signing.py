@@ -0,0 +1,79 @@
+"""
+Сравнение скорости подписи и проверки JWT для RS256, ES256 и EdDSA.
+
+    python -m benchmarks.jwt_signing --iterations 2000 --json
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.crypto import CryptoService
+from app.services.key_ring import KeyRing
+from app.services.keygen import SUPPORTED_ALGORITHMS, write_key_pair
+
+
+def measure(func, iterations: int) -> float:
+    """
+    Возвращает число операций в секунду
+    """
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - started)
+
+
+def bench_algorithm(algorithm: str, directory: Path, iterations: int) -> dict:
+    private_path, public_path = write_key_pair(algorithm, directory, prefix=algorithm)
+    key_ring = KeyRing(private_path, public_path, algorithm)
+    crypto = CryptoService(key_ring)
+    key = key_ring.signing_key
+    payload = {"sub": "1", "exp": int(time.time()) + 900}
+    token = crypto.encode_jwt(payload, key)
+
+    return {
+        "algorithm": algorithm,
+        "sign_per_sec": measure(lambda: crypto.encode_jwt(payload, key), iterations),
+        "verify_per_sec": measure(lambda: crypto.get_payload(token), iterations),
+        # пара токенов - то, что реально подписывается при логине и refresh
+        "tokens_pair_per_sec": measure(
+            lambda: crypto.create_tokens_pair("1", 10080, 15), iterations
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        choices=SUPPORTED_ALGORITHMS,
+        default=SUPPORTED_ALGORITHMS,
+    )
+    parser.add_argument("--json", action="store_true", help="вывод в формате JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [
+            bench_algorithm(algorithm, Path(directory), args.iterations)
+            for algorithm in args.algorithms
+        ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'algorithm':<10}{'sign/s':>12}{'verify/s':>12}{'pair/s':>12}")
+    for result in results:
+        print(
+            f"{result['algorithm']:<10}"
+            f"{result['sign_per_sec']:>12.0f}"
+            f"{result['verify_per_sec']:>12.0f}"
+            f"{result['tokens_pair_per_sec']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""tasks visibility indexes
+
+Revision ID: 3c8e51d07a42
+Revises: fb9a7d77a7f5
+Create Date: 2026-10-18 19:12:41.508217
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c8e51d07a42"
+down_revision: Union[str, Sequence[str], None] = "fb9a7d77a7f5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# имя -> (колонки, условие частичного индекса)
+INDEXES = {
+    "ix_tasks_project_id_deadline_id": (["project_id", "deadline", "id"], None),
+    "ix_tasks_creator_id_deadline_id": (["creator_id", "deadline", "id"], None),
+    "ix_tasks_no_project_id": (["id"], "project_id IS NULL"),
+    "ix_tasks_no_project_deadline_id": (["deadline", "id"], "project_id IS NULL"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в tasks, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, (columns, where) in INDEXES.items():
+            op.create_index(
+                name,
+                "tasks",
+                columns,
+                unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name="tasks", postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""refresh token hash
+
+Revision ID: 69d6a94555a9
+Revises: 4b1494d3e879
+Create Date: 2026-10-18 12:05:14.310442
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "69d6a94555a9"
+down_revision: Union[str, Sequence[str], None] = "4b1494d3e879"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "refresh_session",
+        sa.Column("refresh_token_hash", sa.String(length=64), nullable=True),
+    )
+    op.execute(
+        "UPDATE refresh_session "
+        "SET refresh_token_hash = encode(sha256(convert_to(refresh_token, 'UTF8')), 'hex')"
+    )
+    # токены, выпущенные в одну секунду, совпадали: оставляем самую новую сессию
+    op.execute(
+        "DELETE FROM refresh_session older USING refresh_session newer "
+        "WHERE older.refresh_token_hash = newer.refresh_token_hash "
+        "AND older.id < newer.id"
+    )
+    op.alter_column("refresh_session", "refresh_token_hash", nullable=False)
+    op.create_index(
+        op.f("ix_refresh_session_refresh_token_hash"),
+        "refresh_session",
+        ["refresh_token_hash"],
+        unique=True,
+    )
+    op.drop_column("refresh_session", "refresh_token")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "refresh_session",
+        sa.Column("refresh_token", sa.String(), nullable=True),
+    )
+    # исходные токены по дайджесту не восстановить, пользователям придется войти заново
+    op.execute("DELETE FROM refresh_session")
+    op.alter_column("refresh_session", "refresh_token", nullable=False)
+    op.drop_index(
+        op.f("ix_refresh_session_refresh_token_hash"), table_name="refresh_session"
+    )
+    op.drop_column("refresh_session", "refresh_token_hash")
@@ -0,0 +1,47 @@
+"""users search trgm index
+
+Revision ID: 9be1a6346d59
+Revises: aec09e5b0d24
+Create Date: 2026-10-18 16:02:11.418237
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9be1a6346d59"
+down_revision: Union[str, Sequence[str], None] = "aec09e5b0d24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY не блокирует запись в users, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_search_trgm",
+            "users",
+            [
+                sa.text(
+                    "lower(first_name || ' ' || last_name || ' ' || email) "
+                    "gin_trgm_ops"
+                )
+            ],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_search_trgm", table_name="users", postgresql_concurrently=True
+        )
@@ -0,0 +1,33 @@
+"""refresh session expires_in index
+
+Revision ID: aec09e5b0d24
+Revises: 69d6a94555a9
+Create Date: 2026-10-18 13:21:47.905112
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "aec09e5b0d24"
+down_revision: Union[str, Sequence[str], None] = "69d6a94555a9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_refresh_session_expires_in"),
+        "refresh_session",
+        ["expires_in"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_refresh_session_expires_in"), table_name="refresh_session")
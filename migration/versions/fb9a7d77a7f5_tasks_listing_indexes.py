@@ -0,0 +1,47 @@
+"""tasks listing indexes
+
+Revision ID: fb9a7d77a7f5
+Revises: 9be1a6346d59
+Create Date: 2026-10-18 18:47:05.263914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "fb9a7d77a7f5"
+down_revision: Union[str, Sequence[str], None] = "9be1a6346d59"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_tasks_project_id_id": ["project_id", "id"],
+    "ix_tasks_project_id_status_id": ["project_id", "status", "id"],
+    "ix_tasks_creator_id_id": ["creator_id", "id"],
+    "ix_tasks_status_id": ["status", "id"],
+    "ix_tasks_deadline_id": ["deadline", "id"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в tasks, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name,
+                "tasks",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name="tasks", postgresql_concurrently=True)
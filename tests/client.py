@@ -0,0 +1,28 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from httpx import AsyncClient, ASGITransport
+
+from app.core.config import settings
+from app.dependencies.dao import get_session_without_commit
+from app.main import app
+
+
+@asynccontextmanager
+async def asgi_client(get_session: Callable) -> AsyncIterator[AsyncClient]:
+    """
+    AsyncClient поверх ASGI-приложения с подмененной зависимостью сессии БД.
+    Используется фикстурами тестов и бенчмарками.
+    :param get_session: замена для get_session_without_commit
+    :return:
+    """
+    app.dependency_overrides[get_session_without_commit] = get_session
+
+    transport = ASGITransport(app=app)
+    try:
+        async with AsyncClient(
+            transport=transport, base_url=f"http://{settings.DOMAIN}"
+        ) as ac:
+            yield ac
+    finally:
+        del app.dependency_overrides[get_session_without_commit]
@@ -2,16 +2,19 @@ import asyncio
 from typing import AsyncGenerator
 
 import pytest
-from httpx import AsyncClient, ASGITransport
+from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
-from app.core.config import settings
-from app.dependencies.dao import get_session_without_commit
-from app.main import app
+from app.core.instrumentation import instrument_engine
+from app.dao.base import count_cache
 from app.models.base import Base
+from app.services.login_throttle import login_throttle
+from app.services.user_cache import user_cache
+from tests.client import asgi_client
 
 
 engine_test = create_async_engine("sqlite+aiosqlite:///:memory:")
+instrument_engine(engine_test)
 async_session_maker = async_sessionmaker(engine_test, expire_on_commit=False)
 
 
@@ -27,6 +30,17 @@ async def prepare_database():
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(autouse=True)
+async def clear_caches():
+    """
+    Сбрасывает кэши и ограничения уровня процесса, чтобы тесты не влияли друг на друга.
+    """
+    user_cache.clear()
+    count_cache.clear()
+    await login_throttle.reset()
+    yield
+
+
 @pytest.fixture(scope="function")
 async def override_get_session() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -49,16 +63,9 @@ async def client(
     """
     Создает AsyncClient с переопределенной зависимостью для сессии БД.
     """
-    app.dependency_overrides[get_session_without_commit] = lambda: override_get_session
-
-    transport = ASGITransport(app=app)
-    async with AsyncClient(
-        transport=transport, base_url=f"http://{settings.DOMAIN}"
-    ) as ac:
+    async with asgi_client(lambda: override_get_session) as ac:
         yield ac
 
-    del app.dependency_overrides[get_session_without_commit]
-
 
 # Это необходимо для pytest-asyncio, чтобы он правильно работал с `scope="session"`
 @pytest.fixture(scope="session")
@@ -1,10 +1,19 @@
+from contextlib import asynccontextmanager
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dao.user import UserDAO
+from app.models import Role
 from app.schemas.user import UserCreate
+from app.core.config import LoginThrottleConfig
+from app.routers import auth as auth_router
+from app.services import auth as auth_service
 from app.services.crypto import CryptoService
+from app.services.login_throttle import LoginThrottle, InMemoryThrottleBackend
+from app.services.password_hasher import password_hasher
+from app.services.user_cache import user_cache
 
 
 @pytest.fixture(scope="module")
@@ -19,6 +28,7 @@ def hashed_password(password):
 
 @pytest.fixture(autouse=True)
 async def create_user(override_get_session: AsyncSession, hashed_password):
+    override_get_session.add(Role(id=2, name="Пользователь", code="user"))
     user_dao = UserDAO(override_get_session)
     await user_dao.create(
         UserCreate(
@@ -146,3 +156,91 @@ async def test_refresh_token_invalid_fingerprint(client: AsyncClient, password):
         cookies={"refresh_token": refresh_token},
     )
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_get_me_uses_cached_snapshot(client: AsyncClient, password):
+    response = await client.post(
+        "/api/auth/login/",
+        json={
+            "email": "test@test.com",
+            "password": password,
+            "fingerprint": "test_fingerprint",
+        },
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await client.get("/api/users/me/", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "test@test.com"
+    assert response.json()["role_name"] == "Пользователь"
+
+    hits = user_cache.hits
+    response = await client.get("/api/users/me/", headers=headers)
+    assert response.status_code == 200
+    assert user_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_login_throttled_before_password_check(
+    client: AsyncClient, monkeypatch
+):
+    throttle = LoginThrottle(
+        InMemoryThrottleBackend(), LoginThrottleConfig(login_email_burst=2)
+    )
+    monkeypatch.setattr(auth_router, "login_throttle", throttle)
+
+    statuses = []
+    for _ in range(3):
+        response = await client.post(
+            "/api/auth/login/",
+            json={
+                "email": "test@test.com",
+                "password": "wrong_password",
+                "fingerprint": "test_fingerprint",
+            },
+        )
+        statuses.append(response.status_code)
+
+    assert statuses == [400, 400, 429]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("rounds_fixed", [False, True])
+async def test_login_rehashes_password_with_current_cost(
+    client: AsyncClient,
+    override_get_session: AsyncSession,
+    password,
+    hashed_password,
+    monkeypatch,
+    rounds_fixed: bool,
+):
+    @asynccontextmanager
+    async def test_session_maker():
+        yield override_get_session
+
+    monkeypatch.setattr(auth_service, "async_session_maker", test_session_maker)
+    # подобранная стоимость только повышает хеш, явно заданная - и понижает
+    if rounds_fixed:
+        target_rounds = 4
+    else:
+        target_rounds = CryptoService.get_rounds(hashed_password) + 1
+    monkeypatch.setattr(password_hasher, "rounds", target_rounds)
+    monkeypatch.setattr(password_hasher, "rounds_fixed", rounds_fixed)
+
+    response = await client.post(
+        "/api/auth/login/",
+        json={
+            "email": "test@test.com",
+            "password": password,
+            "fingerprint": "test_fingerprint",
+        },
+    )
+    assert response.status_code == 200
+
+    user = await UserDAO(override_get_session).find_one_or_none(
+        filter_dict={"email": "test@test.com"}
+    )
+    await override_get_session.refresh(user, ["password"])
+    assert CryptoService.get_rounds(user.password) == target_rounds
+    assert CryptoService.validate_hashed(password, user.password)
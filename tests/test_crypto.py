@@ -0,0 +1,184 @@
+import asyncio
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.services.crypto import CryptoService
+from app.services.key_ring import KeyRing
+from app.services.keygen import write_key_pair
+from app.services.password_hasher import PasswordHasher
+
+
+def write_rsa_pair(directory, name):
+    return write_key_pair("RS256", directory, prefix=name)
+
+
+@pytest.fixture
+def key_paths(tmp_path):
+    return write_rsa_pair(tmp_path, "old")
+
+
+def test_tokens_carry_kid(key_paths):
+    private_path, public_path = key_paths
+    key_ring = KeyRing(private_path, public_path, "RS256")
+    crypto = CryptoService(key_ring)
+
+    pair = crypto.create_tokens_pair("1", 10, 5)
+
+    assert jwt.get_unverified_header(pair.access.token)["kid"] == key_ring.signing_key.kid
+    assert crypto.get_payload(pair.access.token)["sub"] == "1"
+
+
+def test_verified_token_cache(key_paths):
+    private_path, public_path = key_paths
+    key_ring = KeyRing(private_path, public_path, "RS256")
+    crypto = CryptoService(key_ring, token_cache_size=1)
+    first = crypto.create_tokens_pair("1", 10, 5).access.token
+    second = crypto.create_tokens_pair("2", 10, 5).access.token
+
+    assert crypto.get_payload(first, use_cache=True)["sub"] == "1"
+    assert crypto.get_payload(first, use_cache=True)["sub"] == "1"
+    assert crypto.get_payload(second, use_cache=True)["sub"] == "2"
+    assert crypto.token_cache.stats() == {"size": 1, "maxsize": 1, "hits": 1, "misses": 2}
+
+    key_ring.load()
+    assert len(crypto.token_cache) == 0
+
+
+def test_rotation_keeps_old_tokens_valid(tmp_path, key_paths):
+    old_private, old_public = key_paths
+    old_ring = KeyRing(old_private, old_public, "RS256")
+    old_token = CryptoService(old_ring).create_tokens_pair("1", 10, 5).access.token
+
+    new_private, new_public = write_rsa_pair(tmp_path, "new")
+    key_ring = KeyRing(new_private, new_public, "RS256", extra_public_keys=[old_public])
+    crypto = CryptoService(key_ring)
+
+    assert crypto.get_payload(old_token)["sub"] == "1"
+    new_token = crypto.create_tokens_pair("2", 10, 5).access.token
+    assert jwt.get_unverified_header(new_token)["kid"] != old_ring.signing_key.kid
+
+    without_old = CryptoService(KeyRing(new_private, new_public, "RS256"))
+    with pytest.raises(HTTPException):
+        without_old.get_payload(old_token)
+
+
+def test_cached_token_rejected_after_its_key_is_removed(tmp_path, key_paths):
+    old_private, old_public = key_paths
+    old_token = CryptoService(KeyRing(old_private, old_public, "RS256")).create_tokens_pair(
+        "1", 10, 5
+    ).access.token
+    new_private, new_public = write_rsa_pair(tmp_path, "new")
+    extra_public = tmp_path / "extra-public.pem"
+    extra_public.write_bytes(old_public.read_bytes())
+    key_ring = KeyRing(
+        new_private, new_public, "RS256", extra_public_keys=[extra_public], check_interval=0
+    )
+    crypto = CryptoService(key_ring, token_cache_size=10)
+    assert crypto.get_payload(old_token, use_cache=True)["sub"] == "1"
+
+    # старый ключ выведен из ротации: в extra_public_keys теперь новый ключ
+    extra_public.write_bytes(new_public.read_bytes())
+    with pytest.raises(HTTPException):
+        crypto.get_payload(old_token, use_cache=True)
+
+
+def test_reload_only_when_files_change(tmp_path, key_paths):
+    private_path, public_path = key_paths
+    key_ring = KeyRing(private_path, public_path, "RS256", check_interval=0)
+    key_ring.load()
+    kid = key_ring.signing_key.kid
+
+    assert key_ring.refresh() is False
+
+    new_private, new_public = write_rsa_pair(tmp_path, "new")
+    private_path.write_bytes(new_private.read_bytes())
+    public_path.write_bytes(new_public.read_bytes())
+
+    assert key_ring.refresh() is True
+    assert key_ring.signing_key.kid != kid
+
+
+@pytest.mark.parametrize("algorithm", ["ES256", "EdDSA"])
+def test_algorithm_migration_accepts_old_rsa_tokens(tmp_path, key_paths, algorithm):
+    old_private, old_public = key_paths
+    old_crypto = CryptoService(KeyRing(old_private, old_public, "RS256"))
+    old_token = old_crypto.create_tokens_pair("1", 10, 5).access.token
+
+    new_private, new_public = write_key_pair(algorithm, tmp_path, prefix=algorithm)
+    crypto = CryptoService(
+        KeyRing(new_private, new_public, algorithm, extra_public_keys=[old_public])
+    )
+    new_token = crypto.create_tokens_pair("2", 10, 5).access.token
+
+    assert jwt.get_unverified_header(new_token)["alg"] == algorithm
+    assert crypto.get_payload(new_token)["sub"] == "2"
+    assert crypto.get_payload(old_token)["sub"] == "1"
+
+
+def test_tokens_without_kid_use_key_of_their_algorithm(tmp_path, key_paths):
+    old_private, old_public = key_paths
+    # токен в формате до появления набора ключей: без kid в заголовке
+    legacy_token = jwt.encode(
+        {"sub": "1", "exp": 2**40}, old_private.read_bytes(), algorithm="RS256"
+    )
+    assert "kid" not in jwt.get_unverified_header(legacy_token)
+
+    old_crypto = CryptoService(KeyRing(old_private, old_public, "RS256"))
+    assert old_crypto.get_payload(legacy_token)["sub"] == "1"
+
+    new_private, new_public = write_key_pair("EdDSA", tmp_path, prefix="EdDSA")
+    crypto = CryptoService(
+        KeyRing(new_private, new_public, "EdDSA", extra_public_keys=[old_public])
+    )
+    assert crypto.get_payload(legacy_token)["sub"] == "1"
+
+    without_old = CryptoService(KeyRing(new_private, new_public, "EdDSA"))
+    with pytest.raises(HTTPException):
+        without_old.get_payload(legacy_token)
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_roundtrip():
+    hasher = PasswordHasher(workers=1)
+    try:
+        hashed = await hasher.hash("testpassword")
+        assert await hasher.verify("testpassword", hashed)
+        assert not await hasher.verify("wrong_password", hashed)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_full():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    try:
+        results = await asyncio.gather(
+            hasher.hash("testpassword"),
+            hasher.hash("testpassword"),
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], bytes)
+        assert isinstance(results[1], HTTPException)
+        assert results[1].status_code == 503
+        assert hasher.pending == 0
+    finally:
+        hasher.shutdown()
+
+
+def test_password_hasher_calibrate_and_needs_rehash():
+    hasher = PasswordHasher(rounds=4)
+    assert not hasher.needs_rehash(CryptoService.hash_password("testpassword", 4))
+
+    assert hasher.calibrate(target_ms=0.001, min_rounds=4, max_rounds=6) == 4
+    assert hasher.calibrate(target_ms=10_000, min_rounds=4, max_rounds=6) == 6
+    assert hasher.needs_rehash(CryptoService.hash_password("testpassword", 4))
+    # подобранная стоимость не понижает более дорогой хеш
+    hasher.rounds = 4
+    assert not hasher.needs_rehash(CryptoService.hash_password("testpassword", 5))
+
+    # явно заданная - понижает
+    fixed = PasswordHasher(rounds=4)
+    assert fixed.needs_rehash(CryptoService.hash_password("testpassword", 5))
+    assert not fixed.needs_rehash(CryptoService.hash_password("testpassword", 4))
@@ -0,0 +1,389 @@
+from contextlib import aclosing
+
+import pytest
+from fastapi import HTTPException
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from app.dao.base import statement_cache
+from app.dao.explain import Explain
+from app.dao.log import dao_logger
+from app.dao.pagination import encode_cursor
+from app.dao.projection import projection_for
+from app.dao.role import RoleDAO
+from app.dao.user import UserDAO
+from app.models import Comment, Role, User
+from app.schemas.comment import CommentRead
+from app.schemas.pagination import CountResult
+from app.schemas.role import Role as RoleSchema
+from app.schemas.user import UserCreate, UserInfo
+
+
+@pytest.mark.asyncio
+async def test_user_create_conflict_on_email(override_get_session: AsyncSession):
+    override_get_session.add(Role(id=2, name="Пользователь", code="user"))
+    dao = UserDAO(override_get_session)
+    data = UserCreate(
+        email="dao@test.com", password=b"hash", first_name="Test", last_name="User"
+    )
+
+    user = await dao.create(data)
+    assert user.id is not None
+
+    assert await dao.insert_or_ignore(data, conflict_columns=["email"]) is None
+    with pytest.raises(HTTPException) as exc:
+        await dao.create(data)
+    assert exc.value.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_upsert_inserts_then_updates(override_get_session: AsyncSession):
+    dao = RoleDAO(override_get_session)
+
+    role = await dao.upsert(
+        RoleSchema(id=10, name="Гость", description=None, code="guest"),
+        conflict_columns=["code"],
+        update_fields=["name", "description"],
+    )
+    assert role.name == "Гость"
+
+    updated = await dao.upsert(
+        RoleSchema(id=10, name="Гость (только чтение)", description="r/o", code="guest"),
+        conflict_columns=["code"],
+        update_fields=["name", "description"],
+    )
+    assert updated.id == role.id
+    assert updated.name == "Гость (только чтение)"
+    assert await dao.count(filter_dict={"code": "guest"}) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("order_desc", [False, True])
+async def test_find_page_walks_all_records(
+    override_get_session: AsyncSession, order_desc: bool
+):
+    # одинаковые имена проверяют, что первичный ключ разрешает совпадения
+    for i in range(7):
+        override_get_session.add(Role(id=100 + i, name=f"role-{i // 2}", code=f"r{i}"))
+    await override_get_session.flush()
+    dao = RoleDAO(override_get_session)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = await dao.find_page(
+            order_by=("name",), cursor=cursor, limit=3, order_desc=order_desc
+        )
+        seen += [role.id for role in page.items]
+        pages += 1
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    expected = sorted(range(100, 107), reverse=order_desc)
+    assert seen == expected
+    assert pages == 3
+
+
+@pytest.mark.asyncio
+async def test_find_page_rejects_foreign_cursor(override_get_session: AsyncSession):
+    override_get_session.add_all(
+        [Role(id=200 + i, name="r", code=f"c{i}") for i in range(3)]
+    )
+    await override_get_session.flush()
+    dao = RoleDAO(override_get_session)
+    page = await dao.find_page(order_by=("name",), limit=1)
+
+    for cursor in (page.next_cursor + "!", "bm90LWpzb24"):
+        with pytest.raises(HTTPException) as exc:
+            await dao.find_page(order_by=("name",), cursor=cursor)
+        assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        await dao.find_page(order_by=("code",), cursor=page.next_cursor)
+
+
+@pytest.mark.asyncio
+async def test_find_page_validates_cursor_types_and_order_by(
+    override_get_session: AsyncSession,
+):
+    dao = RoleDAO(override_get_session)
+    columns = [Role.name, Role.id]
+    # имена колонок верные, но значения не того типа
+    for values in (["r", "x"], [1, 2], ["r", True], ["r", 1.5]):
+        with pytest.raises(HTTPException) as exc:
+            await dao.find_page(
+                order_by=("name",), cursor=encode_cursor(columns, values)
+            )
+        assert exc.value.status_code == 400
+    page = await dao.find_page(
+        order_by=("name",), cursor=encode_cursor(columns, ["r", 1])
+    )
+    assert page.next_cursor is None
+
+    with pytest.raises(ValueError):
+        await dao.find_page(order_by=("no_such_column",))
+
+
+@pytest.mark.asyncio
+async def test_search_users_pages_matches(override_get_session: AsyncSession):
+    override_get_session.add(Role(id=2, name="Пользователь", code="user"))
+    dao = UserDAO(override_get_session)
+    await dao.create_batch(
+        [
+            UserCreate(
+                email=f"user{i}@{'acme' if i % 2 else 'other'}.com",
+                password=b"hash",
+                first_name="Ivan" if i < 3 else "Petr",
+                last_name="Smith",
+            )
+            for i in range(10)
+        ]
+    )
+
+    page = await dao.search_by_name_or_email("  ACME ", limit=3)
+    assert len(page.items) == 3
+    second = await dao.search_by_name_or_email(
+        "acme", limit=3, cursor=page.next_cursor
+    )
+    assert second.next_cursor is None
+    emails = [user.email for user in page.items + second.items]
+    assert emails == [f"user{i}@acme.com" for i in (1, 3, 5, 7, 9)]
+
+    page = await dao.search_by_name_or_email("ivan smith")
+    assert {user.email for user in page.items} == {
+        "user0@other.com",
+        "user1@acme.com",
+        "user2@other.com",
+    }
+    # спецсимволы LIKE в запросе ищутся как обычные символы
+    assert (await dao.search_by_name_or_email("%")).items == []
+
+
+@pytest.mark.asyncio
+async def test_find_as_maps_rows_to_schema(override_get_session: AsyncSession):
+    override_get_session.add(Role(id=2, name="Пользователь", code="user"))
+    dao = UserDAO(override_get_session)
+    await dao.create_batch(
+        [
+            UserCreate(
+                email=f"as{i}@test.com",
+                password=b"hash",
+                first_name="Test",
+                last_name=f"User{i}",
+            )
+            for i in range(3)
+        ]
+    )
+    override_get_session.expunge_all()
+
+    users = await dao.find_as(
+        UserInfo, filter_dict={"first_name": "Test"}, order_by_field="email", limit=2
+    )
+    assert [user.email for user in users] == ["as0@test.com", "as1@test.com"]
+    assert all(isinstance(user, UserInfo) for user in users)
+    assert users[0].role.code == "user"
+    assert users[0].model_dump()["role_name"] == "Пользователь"
+    # ORM-объекты не создавались
+    assert len(override_get_session.identity_map) == 0
+
+
+@pytest.mark.asyncio
+async def test_password_and_unrequested_columns_are_not_loaded(
+    override_get_session: AsyncSession,
+):
+    override_get_session.add(Role(id=2, name="Пользователь", code="user"))
+    dao = UserDAO(override_get_session)
+    await dao.create(
+        UserCreate(
+            email="lazy@test.com", password=b"hash", first_name="Test", last_name="User"
+        )
+    )
+    override_get_session.expunge_all()
+
+    user = await dao.find_one_or_none(filter_dict={"email": "lazy@test.com"})
+    assert user.first_name == "Test"
+    with pytest.raises(InvalidRequestError):
+        user.password
+    # undefer дозагружает хеш уже загруженному объекту
+    user = await dao.find_one_or_none(
+        filter_dict={"email": "lazy@test.com"}, options=[undefer(User.password)]
+    )
+    assert user.password == b"hash"
+    override_get_session.expunge_all()
+
+    [user] = await dao.find(columns=["email"])
+    assert user.email == "lazy@test.com"
+    with pytest.raises(InvalidRequestError):
+        user.first_name
+    override_get_session.expunge_all()
+
+    user = await dao.find_one_or_none(filter_dict={"id": user.id}, schema=UserInfo)
+    assert UserInfo.model_validate(user).role_name == "Пользователь"
+
+
+def test_projection_resolves_validation_alias():
+    projection = projection_for(Comment, CommentRead)
+    assert set(projection.fields) == {"content", "id", "user_id", "task_id"}
+    assert projection.joins == []
+
+
+@pytest.mark.asyncio
+async def test_get_count_modes(override_get_session: AsyncSession):
+    override_get_session.add_all(
+        [Role(id=300 + i, name="count", code=f"n{i}") for i in range(3)]
+    )
+    await override_get_session.flush()
+    dao = RoleDAO(override_get_session)
+
+    # на SQLite оценки планировщика нет, возвращается точное число
+    for mode in ("exact", "estimate", "auto"):
+        result = await dao.get_count(filter_dict={"name": "count"}, mode=mode)
+        assert result == CountResult(value=3, exact=True)
+
+    assert (await dao.get_count(filter_dict={"name": "count"}, mode="cached")).value == 3
+    override_get_session.add(Role(id=303, name="count", code="n3"))
+    await override_get_session.flush()
+    assert (await dao.get_count(filter_dict={"name": "count"}, mode="cached")).value == 3
+    assert (await dao.get_count(filter_dict={"name": "count"})).value == 4
+
+
+def test_explain_keeps_filter_values_as_parameters():
+    email = "x' OR '1'='1"
+    compiled = Explain(select(User).filter_by(email=email)).compile(
+        dialect=postgresql.asyncpg.dialect()
+    )
+    assert compiled.string.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert email not in compiled.string
+    assert list(compiled.params.values()) == [email]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("return_instances", [True, False])
+async def test_create_batch_bulk(
+    override_get_session: AsyncSession, return_instances: bool
+):
+    override_get_session.add(Role(id=2, name="Пользователь", code="user"))
+    dao = UserDAO(override_get_session)
+    batch = [
+        UserCreate(
+            email=f"bulk-{i}@test.com", password=b"hash", first_name="Bulk", last_name="User"
+        )
+        for i in range(50)
+    ]
+
+    result = await dao.create_batch(
+        batch, bulk=True, return_instances=return_instances
+    )
+
+    if return_instances:
+        assert sorted(user.email for user in result) == sorted(u.email for u in batch)
+        assert all(user.id and user.role_id == 2 for user in result)
+    else:
+        assert result == 50
+    assert await dao.count(filter_dict={"first_name": "Bulk"}) == 50
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_all_records_in_chunks(override_get_session: AsyncSession):
+    override_get_session.add_all(
+        [Role(id=400 + i, name="stream", code=f"s{i}") for i in range(25)]
+    )
+    await override_get_session.flush()
+    dao = RoleDAO(override_get_session)
+
+    ids = [
+        role.id
+        async for role in dao.stream(
+            filter_dict={"name": "stream"},
+            order_by_field="id",
+            order_desc=True,
+            chunk_size=10,
+        )
+    ]
+    assert ids == list(range(424, 399, -1))
+
+    # досрочный выход из перебора закрывает курсор и не ломает сессию
+    async with aclosing(dao.stream(filter_dict={"name": "stream"}, chunk_size=10)) as rows:
+        async for _ in rows:
+            break
+    assert await dao.count(filter_dict={"name": "stream"}) == 25
+
+
+@pytest.mark.asyncio
+async def test_find_reuses_cached_statement(override_get_session: AsyncSession):
+    override_get_session.add_all(
+        [
+            Role(
+                id=500 + i,
+                name="cached",
+                code=f"k{i}",
+                description=None if i % 2 else "d",
+            )
+            for i in range(6)
+        ]
+    )
+    await override_get_session.flush()
+    dao = RoleDAO(override_get_session)
+
+    first = await dao.find(filter_dict={"name": "cached", "description": None}, limit=2)
+    cache_size = len(statement_cache)
+    second = await dao.find(
+        filter_dict={"name": "cached", "description": None}, offset=2, limit=2
+    )
+
+    assert len(statement_cache) == cache_size
+    assert len(first) == 2 and len(second) == 1
+    assert {r.id for r in first + second} == {501, 503, 505}
+    assert await dao.count(filter_dict={"name": "cached", "description": "d"}) == 3
+
+
+@pytest.fixture
+def debug_messages():
+    messages = []
+    handler_id = logger.add(messages.append, level="DEBUG", format="{message}")
+    yield messages
+    logger.remove(handler_id)
+
+
+@pytest.mark.asyncio
+async def test_dao_debug_log_redacts_sensitive_fields(
+    override_get_session: AsyncSession, debug_messages: list
+):
+    override_get_session.add(Role(id=2, name="Пользователь", code="user"))
+    dao = UserDAO(override_get_session)
+    await dao.create(
+        UserCreate(
+            email="log@test.com",
+            password=b"secret-hash",
+            first_name="Test",
+            last_name="User",
+        )
+    )
+    await dao.find_one_or_none(filter_dict={"email": "log@test.com"})
+
+    logged = "".join(str(m) for m in debug_messages)
+    assert "log@test.com" in logged
+    assert "secret-hash" not in logged
+    assert "'password': '***'" in logged
+    assert debug_messages[0].record["extra"]["model"] == "User"
+
+
+def test_dao_debug_log_is_lazy_when_disabled():
+    # глобальные обработчики не трогаем: если какой-то из них принимает DEBUG,
+    # ленивость не проверить
+    probe = []
+    dao_logger.debug("{value}", value=lambda: probe.append("debug"))
+    if probe:
+        pytest.skip("DEBUG включен в текущей конфигурации логов")
+
+    calls = []
+    handler_id = logger.add(lambda _: None, level="INFO")
+    try:
+        dao_logger.debug("{value}", value=lambda: calls.append("debug"))
+        dao_logger.info("{value}", value=lambda: calls.append("info"))
+    finally:
+        logger.remove(handler_id)
+    assert calls == ["info"]
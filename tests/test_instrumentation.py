@@ -0,0 +1,87 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.instrumentation import SQLInstrumentationMiddleware, route_metrics
+from app.models import Role, User
+from app.services.auth import crypto_service
+from tests.conftest import engine_test
+
+
+@pytest.mark.asyncio
+async def test_server_timing_and_metrics(
+    client: AsyncClient, override_get_session: AsyncSession, monkeypatch
+):
+    override_get_session.add_all(
+        [
+            Role(id=2, name="Пользователь", code="user"),
+            Role(id=3, name="Администратор", code="admin"),
+        ]
+    )
+    override_get_session.add_all(
+        User(
+            id=i,
+            email=f"metrics{i}@test.com",
+            password=b"hash",
+            first_name="Test",
+            last_name="User",
+            role_id=role_id,
+        )
+        for i, role_id in ((1, 2), (2, 3))
+    )
+    await override_get_session.commit()
+    headers = {
+        sub: {
+            "Authorization": "Bearer "
+            + crypto_service.create_tokens_pair(
+                sub=sub, refresh_exp_minutes=5, access_exp_minutes=5
+            ).access.token
+        }
+        for sub in ("1", "2")
+    }
+
+    route_metrics.clear()
+    response = await client.post(
+        "/api/auth/login/",
+        json={"email": "nobody@test.com", "password": "password", "fingerprint": "f"},
+    )
+    assert response.status_code == 400
+    timing = response.headers["server-timing"]
+    assert 'desc="1 queries"' in timing
+    assert "db-pool;dur=" in timing
+
+    # по умолчанию статистика закрыта для всех, в том числе для админа
+    assert (await client.get("/api/metrics")).status_code == 403
+    assert (await client.get("/api/metrics", headers=headers["2"])).status_code == 403
+
+    monkeypatch.setattr(settings.instrumentation, "metrics_role_codes", ["admin"])
+    assert (await client.get("/api/metrics", headers=headers["1"])).status_code == 403
+    metrics = (await client.get("/api/metrics", headers=headers["2"])).json()
+    assert metrics["POST /api/auth/login/"]["statements"] == 1
+    assert metrics["POST /api/auth/login/"]["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_statement_is_reported():
+    async def app(scope, receive, send):
+        async with engine_test.connect() as conn:
+            for i in range(3):
+                await conn.execute(text("SELECT :i"), {"i": i})
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    warnings = []
+    handler_id = logger.add(warnings.append, level="WARNING", format="{message}")
+    try:
+        transport = ASGITransport(app=SQLInstrumentationMiddleware(app, 2))
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get("/items")
+    finally:
+        logger.remove(handler_id)
+
+    assert 'desc="3 queries"' in response.headers["server-timing"]
+    assert len(warnings) == 1
+    assert "N+1" in warnings[0] and "SELECT ?" in warnings[0]
@@ -0,0 +1,122 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from app.core.config import settings
+from app.dao.refresh_session import RefreshSessionDAO
+from app.models.base import Base
+from app.schemas.token import TokenSession
+from app.services.auth import crypto_service
+from app.services.crypto import CryptoService
+from app.services.session_sweeper import sweep_expired_sessions
+from tests.conftest import engine_test
+
+
+def make_session(user_id: int, token: str, expires_in: int = 2_000_000_000):
+    return TokenSession(
+        user_id=user_id,
+        refresh_token_hash=CryptoService.hash_token(token),
+        user_agent="pytest",
+        fingerprint="test_fingerprint",
+        ip="127.0.0.1",
+        expires_in=expires_in,
+    )
+
+
+@pytest.mark.asyncio
+async def test_session_is_found_by_token_digest(override_get_session: AsyncSession):
+    dao = RefreshSessionDAO(override_get_session)
+    await dao.create_session(make_session(1, "token-1"), max_sessions=3)
+
+    refresh_session = await dao.get_session_by_refresh_token("token-1")
+
+    assert refresh_session is not None
+    assert len(refresh_session.refresh_token_hash) == 64
+    assert refresh_session.refresh_token_hash != "token-1"
+    assert await dao.get_session_by_refresh_token("token-2") is None
+
+
+@pytest.fixture
+def sql_log(override_get_session: AsyncSession):
+    """
+    Собирает выполненные SQL-выражения и число коммитов сессии
+    """
+    log = {"statements": [], "commits": 0}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        log["statements"].append(statement)
+
+    def on_commit(session):
+        log["commits"] += 1
+
+    event.listen(engine_test.sync_engine, "before_cursor_execute", on_execute)
+    event.listen(override_get_session.sync_session, "after_commit", on_commit)
+    yield log
+    event.remove(engine_test.sync_engine, "before_cursor_execute", on_execute)
+    event.remove(override_get_session.sync_session, "after_commit", on_commit)
+
+
+@pytest.mark.asyncio
+async def test_trim_keeps_newest_sessions(override_get_session: AsyncSession):
+    dao = RefreshSessionDAO(override_get_session)
+    for i in range(5):
+        await dao.create_session(make_session(7, f"token-{i}"), max_sessions=10)
+
+    deleted = await dao.trim_sessions(7, keep=2)
+
+    assert deleted == 3
+    remaining = await dao.find(filter_dict={"user_id": 7})
+    assert {s.refresh_token_hash for s in remaining} == {
+        CryptoService.hash_token("token-3"),
+        CryptoService.hash_token("token-4"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_in_one_transaction(
+    client: AsyncClient, override_get_session: AsyncSession, sql_log
+):
+    dao = RefreshSessionDAO(override_get_session)
+    for i in range(settings.auth_jwt.max_sessions):
+        await dao.create_session(make_session(1, f"old-{i}"), max_sessions=10)
+    refresh_token = crypto_service.create_tokens_pair("1", 10, 5).refresh.token
+    await dao.create_session(make_session(1, refresh_token), max_sessions=10)
+    await override_get_session.commit()
+    sql_log["statements"].clear()
+    sql_log["commits"] = 0
+
+    client.cookies.set("refresh_token", refresh_token)
+    response = await client.post("/api/auth/refresh", json="test_fingerprint")
+
+    assert response.status_code == 200
+    # DELETE ... RETURNING, DELETE лишних сессий, INSERT новой
+    assert len(sql_log["statements"]) == 3
+    assert sql_log["commits"] == 1
+    assert await dao.count(filter_dict={"user_id": 1}) == settings.auth_jwt.max_sessions
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transaction_lock", [False, True])
+async def test_sweeper_deletes_expired_sessions_in_batches(
+    tmp_path, transaction_lock: bool
+):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'sweep.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine)() as session:
+        dao = RefreshSessionDAO(session)
+        for i in range(5):
+            await dao.create(make_session(1, f"expired-{i}", expires_in=100))
+        await dao.create(make_session(1, "alive", expires_in=10_000))
+        await session.commit()
+
+    result = await sweep_expired_sessions(
+        engine, batch_size=2, now=1_000, transaction_lock=transaction_lock
+    )
+
+    assert result.deleted == 5
+    assert result.batches == 3
+    async with async_sessionmaker(engine)() as session:
+        assert await RefreshSessionDAO(session).count(filter_dict={}) == 1
+    await engine.dispose()
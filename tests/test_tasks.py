@@ -0,0 +1,187 @@
+import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Project, ProjectMembers, Role, Task, User
+from app.models.enums.task_status import Status
+from app.models.task_responsibles import TaskResponsibles
+from app.schemas.task import TaskFilter
+from app.services.auth import crypto_service
+
+DEADLINE = datetime.datetime(2026, 1, 1)
+
+
+@pytest.fixture(autouse=True, params=["branches", "filter"])
+def visibility_mode(request, monkeypatch):
+    """
+    Оба способа проверки видимости в find_tasks_page: выборки по проектам
+    пользователя и общий фильтр (когда видимых проектов больше порога)
+    """
+    if request.param == "filter":
+        monkeypatch.setattr(settings.task_list, "task_list_branch_projects", 0)
+
+
+@pytest.fixture
+async def headers(override_get_session: AsyncSession) -> dict:
+    """
+    Пользователи, проект и 10 задач: четные - в проекте, каждая третья выполнена,
+    у задачи i срок DEADLINE + i дней, задачи 0-4 назначены пользователю 2
+    """
+    override_get_session.add(Role(id=2, name="Пользователь", code="user"))
+    override_get_session.add_all(
+        User(
+            id=i,
+            email=f"tasks{i}@test.com",
+            password=b"hash",
+            first_name="Test",
+            last_name="User",
+        )
+        for i in (1, 2)
+    )
+    override_get_session.add(Project(id=1, name="Project", creator_id=1))
+    await override_get_session.flush()
+    override_get_session.add_all(
+        Task(
+            id=i + 1,
+            name=f"Task {i}",
+            creator_id=1,
+            project_id=1 if i % 2 == 0 else None,
+            status=Status.DONE if i % 3 == 0 else Status.PENDING,
+            deadline=DEADLINE + datetime.timedelta(days=i),
+        )
+        for i in range(10)
+    )
+    await override_get_session.flush()
+    override_get_session.add_all(
+        TaskResponsibles(user_id=2, task_id=i + 1) for i in range(5)
+    )
+    await override_get_session.commit()
+
+    tokens = crypto_service.create_tokens_pair(
+        sub="1", refresh_exp_minutes=5, access_exp_minutes=5
+    )
+    return {"Authorization": f"Bearer {tokens.access.token}"}
+
+
+async def list_ids(client: AsyncClient, headers: dict, **params) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/tasks", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        ids += [task["id"] for task in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_pages_newest_first(client: AsyncClient, headers: dict):
+    assert await list_ids(client, headers, limit=3) == list(range(10, 0, -1))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({"project_id": 1}, [9, 7, 5, 3, 1]),
+        ({"project_id": 1, "status": Status.DONE.value}, [7, 1]),
+        ({"creator_id": 2}, []),
+        ({"assignee_id": 2, "status": Status.PENDING.value}, [5, 3, 2]),
+        (
+            {
+                "deadline_from": (DEADLINE + datetime.timedelta(days=2)).isoformat(),
+                "deadline_to": (DEADLINE + datetime.timedelta(days=4)).isoformat(),
+            },
+            [5, 4, 3],
+        ),
+    ],
+)
+async def test_list_tasks_filters(
+    client: AsyncClient, headers: dict, params: dict, expected: list[int]
+):
+    assert await list_ids(client, headers, limit=2, **params) == expected
+
+
+@pytest.mark.asyncio
+async def test_deadline_range_pages_by_deadline(
+    client: AsyncClient, override_get_session: AsyncSession, headers: dict
+):
+    day = datetime.timedelta(days=1)
+    override_get_session.add_all(
+        [
+            Task(id=11, name="Earlier", creator_id=1, deadline=DEADLINE - day),
+            Task(id=12, name="Tie", creator_id=1, deadline=DEADLINE + day),
+            Task(id=13, name="No deadline", creator_id=1),
+        ]
+    )
+    await override_get_session.commit()
+
+    # по убыванию (deadline, id): равные сроки упорядочены по id и на границе страниц
+    params = {"deadline_from": (DEADLINE - day).isoformat()}
+    ids = await list_ids(
+        client, headers, limit=1, deadline_to=(DEADLINE + day).isoformat(), **params
+    )
+    assert ids == [12, 2, 1, 11]
+    assert 13 not in await list_ids(client, headers, limit=4, **params)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "deadline_from", ["2026-01-03T00:00:00Z", "2026-01-03T03:00:00+03:00"]
+)
+async def test_deadline_filter_accepts_timezone_aware_values(
+    client: AsyncClient, headers: dict, deadline_from: str
+):
+    # 2026-01-03 00:00 UTC - срок задачи 2 (id 3) и позже
+    assert await list_ids(
+        client, headers, deadline_from=deadline_from, deadline_to="2026-01-04T00:00:00Z"
+    ) == [4, 3]
+    assert TaskFilter(deadline_from=deadline_from).deadline_from == datetime.datetime(
+        2026, 1, 3
+    )
+
+
+@pytest.mark.asyncio
+async def test_private_project_tasks_are_hidden_from_non_members(
+    client: AsyncClient, override_get_session: AsyncSession, headers: dict
+):
+    override_get_session.add(Project(id=2, name="Private", creator_id=1, private=True))
+    await override_get_session.flush()
+    override_get_session.add_all(
+        Task(id=i, name=f"Private {i}", creator_id=1, project_id=2) for i in (11, 12)
+    )
+    await override_get_session.flush()
+    override_get_session.add(TaskResponsibles(user_id=2, task_id=12))
+    await override_get_session.commit()
+    other_headers = {
+        "Authorization": "Bearer "
+        + crypto_service.create_tokens_pair(
+            sub="2", refresh_exp_minutes=5, access_exp_minutes=5
+        ).access.token
+    }
+
+    # создатель проекта видит все, не участник - только назначенную ему задачу
+    assert await list_ids(client, headers, project_id=2) == [12, 11]
+    assert await list_ids(client, other_headers, project_id=2) == [12]
+    assert 11 not in await list_ids(client, other_headers, limit=5)
+
+    override_get_session.add(ProjectMembers(user_id=2, project_id=2))
+    await override_get_session.commit()
+    assert await list_ids(client, other_headers, project_id=2) == [12, 11]
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_requires_auth_and_valid_cursor(
+    client: AsyncClient, headers: dict
+):
+    assert (await client.get("/api/tasks")).status_code in (401, 403)
+    response = await client.get(
+        "/api/tasks", params={"cursor": "not-a-cursor"}, headers=headers
+    )
+    assert response.status_code == 400